@@ -0,0 +1,233 @@
+"""
+Benchmarks of PDA and CFG
+
+Scalable families of automata and grammars are generated and the main operations are timed.
+Each result is written as a line of JSON, so that results of different versions can be compared.
+
+    python benchmark.py --out bench_output.txt
+    python benchmark.py --quick --only read
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from typing import Callable, Iterator, TextIO
+from pda import DPDA, NPDA
+from cfg import CFG
+from cache import ConversionCache
+
+
+################################################################
+# Families of automata, grammars and inputs
+def anbnDpda() -> DPDA:
+    """
+    DPDA of a^n b^n (n>0), the first example of DPDASample1
+    """
+    delta:dict[tuple[str,str,str],tuple[str,list[str]]] = {
+        ('q_0','a','Z'):('q_0',['A','Z']),
+        ('q_0','a','A'):('q_0',['A','A']),
+        ('q_0','b','A'):('q_1',[]),
+        ('q_1','b','A'):('q_1',[]),
+        ('q_1','','Z'):('q_2',[]),
+    }
+    return DPDA('q_0',delta,{'q_2'},'Z')
+
+
+def anbn(n:int) -> str:
+    return 'a'*n+'b'*n
+
+
+def palindromeCfg() -> CFG:
+    """
+    CFG of palindromes of odd length over {a,b}, the example of cfg2PDA
+    """
+    P: dict[str, list[list[str]]] = {
+        'S':[['a'],['b'],['a','S','A'],['b','S','B']],
+        'A':[['a']],
+        'B':[['b']]
+    }
+    return CFG(P,'S')
+
+
+def evenPalindromeCfg() -> CFG:
+    """
+    CFG of palindromes of even length over {a,b} in GNF, S -> aSa | bSb | aa | bb
+    """
+    P: dict[str, list[list[str]]] = {
+        'S':[['a','A'],['b','B'],['a','S','A'],['b','S','B']],
+        'A':[['a']],
+        'B':[['b']]
+    }
+    return CFG(P,'S')
+
+
+def palindrome(n:int, seed:int = 0, even:bool = False) -> str:
+    """
+    Palindrome of length 2n+1, or 2n if even
+    """
+    r = random.Random(seed)
+    half = ''.join(r.choice('ab') for _ in range(n))
+    return half+('' if even else r.choice('ab'))+half[::-1]
+
+
+BRACKETS = ['()','[]','{}','<>']
+
+def dyckDpda(k:int) -> DPDA:
+    """
+    DPDA of the Dyck language with k kinds of brackets
+    """
+    symbols = [f'B_{i}' for i in range(k)]
+    delta:dict[tuple[str,str,str],tuple[str,list[str]]] = dict()
+    for i,(o,c) in enumerate(BRACKETS[:k]):
+        for g in symbols+['Z']:
+            delta[('q_0',o,g)] = ('q_0',[symbols[i],g])
+        delta[('q_0',c,symbols[i])] = ('q_0',[])
+    delta[('q_0','','Z')] = ('q_1',[])
+    return DPDA('q_0',delta,{'q_1'},'Z')
+
+
+def dyckNpda(k:int) -> NPDA:
+    """
+    NPDA of the Dyck language with k kinds of brackets accepting by empty stack
+    """
+    dpda = dyckDpda(k)
+    delta:dict[tuple[str,str,str],list[tuple[str,list[str]]]] = {f:[dpda.delta[f]] for f in dpda.delta}
+    return NPDA('q_0',delta,set(),'Z')
+
+
+def dyck(n:int, k:int, seed:int = 0) -> str:
+    """
+    Balanced word of length 2n with k kinds of brackets
+    """
+    r = random.Random(seed)
+    word: list[str] = list()
+    stack: list[str] = list()
+    opened: int = 0
+    while opened < n or stack:
+        if opened < n and (not stack or r.random() < 0.5):
+            (o,c) = BRACKETS[r.randrange(k)]
+            word.append(o)
+            stack.append(c)
+            opened += 1
+        else:
+            word.append(stack.pop())
+    return ''.join(word)
+
+
+def randomGnf(nonterminals:int, terminals:int, rules:int, ambiguity:float, seed:int = 0) -> CFG:
+    """
+    Random CFG in Greibach normal form
+
+    Every nonterminal has rules rules, one of which is a single terminal.
+    With probability ambiguity, a rule starts with the same terminal as the previous one.
+    """
+    r = random.Random(seed)
+    N = ['S']+[f'N_{i}' for i in range(1,nonterminals)]
+    T = [chr(ord('a')+i) for i in range(terminals)]
+    P: dict[str, list[list[str]]] = dict()
+    for A in N:
+        P[A] = [[r.choice(T)]]
+        for _ in range(rules-1):
+            a = P[A][-1][0] if r.random() < ambiguity else r.choice(T)
+            P[A].append([a]+[r.choice(N) for _ in range(r.randint(1,2))])
+    return CFG(P,'S')
+
+
+def randomNpda(states:int, stackSymbols:int, transitions:int, maxPush:int, seed:int = 0) -> NPDA:
+    """
+    Random NPDA over {a,b} accepting by empty stack
+    """
+    r = random.Random(seed)
+    Q = [f'q_{i}' for i in range(states)]
+    G = ['Z']+[f'A_{i}' for i in range(stackSymbols)]
+    delta:dict[tuple[str,str,str],list[tuple[str,list[str]]]] = dict()
+    for _ in range(transitions):
+        f = (r.choice(Q),r.choice('ab'),r.choice(G))
+        delta.setdefault(f,[]).append((r.choice(Q),[r.choice(G) for _ in range(r.randint(0,maxPush))]))
+    return NPDA('q_0',delta,set(),'Z')
+
+
+################################################################
+# Benchmarks
+def timeit(fn:Callable[[],object], repeat:int) -> float:
+    """
+    Minimum time of repeat calls in seconds
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best,time.perf_counter()-t)
+    return best
+
+
+# Conversions are timed without the cache
+NOCACHE = ConversionCache(enabled=False)
+
+def benchmarks(quick:bool) -> Iterator[tuple[str,str,dict[str,float],Callable[[],object]]]:
+    """
+    (benchmark,family,parameters,function) to be timed
+    """
+    lengths = [10,100,1000] if quick else [10,100,1000,10000]
+    for n in lengths:
+        dpda = anbnDpda()
+        yield 'DPDA.read','anbn',{'length':2*n},lambda dpda=dpda,n=n: dpda.read(anbn(n))
+        yield 'DPDA.accepts','anbn',{'length':2*n},lambda dpda=dpda,n=n: dpda.accepts(anbn(n))
+        for k in (1,4):
+            d = dyckDpda(k)
+            w = dyck(n,k)
+            yield 'DPDA.read','dyck',{'length':2*n,'brackets':k},lambda d=d,w=w: d.read(w)
+    for n in ([4,16,64] if quick else [4,16,64,256]):
+        for (family,cfg,even) in (('palindrome',palindromeCfg(),False),('evenPalindrome',evenPalindromeCfg(),True)):
+            npda = cfg.toPda()
+            w = palindrome(n,even=even)
+            yield 'NPDA.read',family,{'length':len(w)},lambda npda=npda,w=w: npda.read(w)
+            yield 'NPDA.findAcceptingRun',family,{'length':len(w)},lambda npda=npda,w=w: npda.findAcceptingRun(w)
+        nd = dyckNpda(2)
+        w2 = dyck(n,2)
+        yield 'NPDA.read','dyck',{'length':len(w2),'brackets':2},lambda nd=nd,w2=w2: nd.read(w2)
+    for (states,push) in ([(2,2),(4,3)] if quick else [(2,2),(4,3),(6,4),(8,5)]):
+        a = randomNpda(states,3,8*states,push)
+        yield 'NPDA.toCfg','random',{'states':states,'push':push,'transitions':8*states},lambda a=a: a.toCfg(cache=NOCACHE)
+    for nonterminals in ([4,16] if quick else [4,16,64,256]):
+        for ambiguity in (0.0,0.5):
+            g = randomGnf(nonterminals,3,4,ambiguity)
+            yield 'CFG.toPda','random',{'nonterminals':nonterminals,'ambiguity':ambiguity},lambda g=g: g.toPda(cache=NOCACHE)
+    for k in ([1,4] if quick else [1,4,16,64]):
+        g = randomGnf(16*k,3,4,0.5)
+        yield 'NPDA.latexExp','random',{'nonterminals':16*k},g.toPda().latexExp
+
+
+def version() -> str:
+    try:
+        return subprocess.run(['git','rev-parse','--short','HEAD'],capture_output=True,text=True,check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run(out:TextIO, repeat:int, quick:bool, only:str|None) -> None:
+    common = {'version':version(),'python':platform.python_version(),'time':time.strftime('%Y-%m-%dT%H:%M:%S')}
+    for (name,family,params,fn) in benchmarks(quick):
+        if only is not None and only not in name:
+            continue
+        seconds = timeit(fn,repeat)
+        record = {'benchmark':name,'family':family,**params,'seconds':seconds,'repeat':repeat,**common}
+        out.write(json.dumps(record)+'\n')
+        out.flush()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks of PDA and CFG')
+    parser.add_argument('--out',help='file to append the results, standard output if omitted')
+    parser.add_argument('--repeat',type=int,default=3,help='number of runs, the minimum time is recorded')
+    parser.add_argument('--quick',action='store_true',help='small sizes only')
+    parser.add_argument('--only',help='run the benchmarks whose name contains this string')
+    args = parser.parse_args()
+    if args.out is None:
+        run(sys.stdout,args.repeat,args.quick,args.only)
+    else:
+        with open(args.out,'a') as fp:
+            run(fp,args.repeat,args.quick,args.only)
@@ -0,0 +1,84 @@
+import time
+from typing import NamedTuple
+
+
+class Budget(NamedTuple):
+    """
+    Resource limits of a run, a limit is not checked if None
+
+    maxSteps Maximum number of configurations explored
+
+    maxHeight Maximum height of the stack
+
+    maxBranches Maximum number of branches waiting to be explored
+
+    deadline Maximum wall-clock time in seconds
+    """
+    maxSteps: int|None = None
+    maxHeight: int|None = None
+    maxBranches: int|None = None
+    deadline: float|None = None
+
+    def guard(self) -> 'BudgetGuard':
+        """
+        Start to consume this budget
+        """
+        return BudgetGuard(self)
+
+
+class BudgetGuard:
+    """
+    Consumption of a budget during a run
+    """
+    # The clock is read once in this number of steps
+    CLOCK_INTERVAL: int = 256
+
+    def __init__(self, budget:Budget) -> None:
+        self._budget: Budget = budget
+        self._steps: int = 0
+        self._limit: float|None = None if budget.deadline is None else time.monotonic()+budget.deadline
+        self._clock: int = 0# steps at which the clock is read next
+
+    def check(self, height:int, branches:int, steps:int = 1) -> str|None:
+        """
+        Count steps and check the limits
+
+        Parameters
+        ---
+        height Height of the stack of the configuration
+
+        branches Number of branches waiting to be explored
+
+        steps Number of steps counted, more than one for configurations explored elsewhere
+
+        Returns
+        ---
+        'steps', 'height', 'branches' or 'deadline' if the limit is exceeded, None otherwise
+        """
+        self._steps += steps
+        budget = self._budget
+        if budget.maxSteps is not None and self._steps > budget.maxSteps:
+            return 'steps'
+        if budget.maxHeight is not None and height > budget.maxHeight:
+            return 'height'
+        if budget.maxBranches is not None and branches > budget.maxBranches:
+            return 'branches'
+        if self._limit is not None and self._steps >= self._clock:
+            self._clock = self._steps+BudgetGuard.CLOCK_INTERVAL
+            if time.monotonic() > self._limit:
+                return 'deadline'
+        return None
+
+    @property
+    def steps(self) -> int:
+        return self._steps
+
+
+class BudgetExceeded(Exception):
+    """
+    A run is stopped because a limit of its budget is exceeded
+    """
+
+    def __init__(self, reason:str) -> None:
+        super().__init__(f'budget exceeded: {reason}')
+        self.reason: str = reason
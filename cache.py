@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+# Version of the results stored in the cache, bumped whenever NPDA._toCfg(), CFG._toPda()
+# or the pickled classes change, so that results of older code are never returned
+CACHE_VERSION: int = 2
+
+
+class ConversionCache:
+    """
+    Cache of the results of NPDA.toCfg() and CFG.toPda()
+
+    A result is stored under the SHA-256 of the canonical form of the converted automaton or grammar,
+    in memory with at most maxsize entries, least recently used first evicted,
+    and in directory if it is given. Results are kept pickled, so that a result given from
+    the cache is a new object. Only a trusted directory should be used, since it is unpickled.
+    The key includes CACHE_VERSION, so that a directory filled by an older version is not used.
+    """
+
+    def __init__(self, maxsize:int = 128, directory:str|None = None, enabled:bool = True) -> None:
+        self._maxsize: int = maxsize
+        self._directory: str|None = directory
+        self._enabled: bool = enabled
+        self._entries: OrderedDict[str,bytes] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        if directory is not None:
+            os.makedirs(directory,exist_ok=True)
+
+    @staticmethod
+    def key(kind:str, canonical:object) -> str:
+        """
+        Hash of CACHE_VERSION, kind and the canonical form,
+        canonical must be made of str, int, list, tuple and dict with str keys
+        """
+        data: str = json.dumps([CACHE_VERSION,kind,canonical],separators=(',',':'),ensure_ascii=False)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    def lookup(self, key:str, compute:Callable[[],T]) -> T:
+        """
+        The result stored under key, computed by compute() and stored if not found
+        """
+        if not self._enabled:
+            return compute()
+        data: bytes|None = self._get(key)
+        if data is not None:
+            self.hits += 1
+            return pickle.loads(data)
+        self.misses += 1
+        value: T = compute()
+        self._put(key,pickle.dumps(value,protocol=pickle.HIGHEST_PROTOCOL))
+        return value
+
+    def _get(self, key:str) -> bytes|None:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        if self._directory is None:
+            return None
+        try:
+            with open(self._path(key),'rb') as fp:
+                data: bytes = fp.read()
+        except OSError:
+            return None
+        self._remember(key,data)
+        return data
+
+    def _put(self, key:str, data:bytes) -> None:
+        self._remember(key,data)
+        if self._directory is None:
+            return
+        # Written to a temporary file and renamed, so that a partial file is never read
+        (fd,temporary) = tempfile.mkstemp(dir=self._directory,suffix='.tmp')
+        with os.fdopen(fd,'wb') as fp:
+            fp.write(data)
+        os.replace(temporary,self._path(key))
+
+    def _remember(self, key:str, data:bytes) -> None:
+        self._entries[key] = data
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def _path(self, key:str) -> str:
+        return os.path.join(self._directory,key+'.pickle')# type: ignore[arg-type]
+
+    def invalidate(self, key:str|None = None) -> None:
+        """
+        Remove the result stored under key, or all the results if key is None
+        """
+        keys: list[str] = list(self._entries.keys()) if key is None else [key]
+        for k in keys:
+            self._entries.pop(k,None)
+        if self._directory is None:
+            return
+        if key is None:
+            keys = [name[:-len('.pickle')] for name in os.listdir(self._directory) if name.endswith('.pickle')]
+        for k in keys:
+            try:
+                os.remove(self._path(k))
+            except FileNotFoundError:
+                pass
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+    @enabled.setter
+    def enabled(self, enabled:bool) -> None:
+        self._enabled = enabled
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize
+
+    @property
+    def directory(self) -> str|None:
+        return self._directory
+
+
+# Cache used by the conversions unless another one is given
+defaultCache: ConversionCache = ConversionCache()
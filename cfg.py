@@ -1,4 +1,28 @@
-from pda import NPDA
+from typing import TYPE_CHECKING, NamedTuple, Sequence
+from earley import EarleyParser, ParseForest
+from cache import ConversionCache, defaultCache
+if TYPE_CHECKING:
+    from pda import NPDA
+
+
+class ReductionReport(NamedTuple):
+    """
+    Sizes of a grammar before and after CFG.reduce()
+
+    branching is the maximum number of rules of a nonterminal starting with the same terminal,
+    which is the maximum number of alternatives of a transition of the NPDA given by CFG.toPda()
+    """
+    rulesBefore: int
+    rulesAfter: int
+    nonterminalsBefore: int
+    nonterminalsAfter: int
+    duplicates: int# rules removed as duplicates
+    useless: int# rules removed with useless symbols
+    factored: int# groups of rules left-factored
+    branchingBefore: int
+    branchingAfter: int
+
+
 class CFG:
     """
     Context Free Grammar: Greibach Normal Form
@@ -8,6 +32,7 @@ class CFG:
         self._P = P
         self._S = S
         self._getAlphabet()
+        self._parser: EarleyParser|None = None
         
     def _getAlphabet(self) -> None:
         self._alphabet:set[str] = set()
@@ -20,10 +45,27 @@ class CFG:
                     for s in entry[1:]:
                         self._N.add(s)
 
-    def toPda(self) -> NPDA:
+    def toPda(self, cache:ConversionCache|None = None, optimize:bool = False) -> 'NPDA':
         """
         空スタックで受理するNPDAへの変換
+
+        The result is looked up in cache, cache.defaultCache if None, under the hash of (P,S).
+        If optimize is True, the grammar given by reduce() is converted.
+        """
+        if optimize:
+            return self.reduce()[0].toPda(cache)
+        if cache is None:
+            cache = defaultCache
+        return cache.lookup(ConversionCache.key('CFG.toPda',self.canonical()),self._toPda)
+
+    def canonical(self) -> list:
         """
+        (P,S) in a canonical form, the order of the rules of a nonterminal is kept
+        """
+        return [[[k,self._P[k]] for k in sorted(self._P)],self._S]
+
+    def _toPda(self) -> 'NPDA':
+        from pda import NPDA
         q = 'q'
         delta:dict[tuple[str,str,str],list[tuple[str,list[str]]]] = dict()
         for k in self._P:
@@ -40,6 +82,180 @@ class CFG:
                 
         return NPDA(q, delta, set(), self._S)
 
+    def reduce(self, factor:bool = True) -> tuple['CFG', ReductionReport]:
+        """
+        Equivalent grammar in GNF with fewer rules and alternatives
+
+        The duplicated rules and the rules with useless symbols, not generating any word or
+        not reachable from S, are removed. If factor is True, the rules A -> a B_1 α_1 | ... | a B_k α_k
+        sharing a terminal a are left-factored into A -> a A' where A' -> b β α_i for each B_i -> b β,
+        so that the rules stay in GNF. A group is factored only if neither the rules nor the branching
+        of the whole grammar increase, after the rules made useless by the factoring are removed.
+
+        Returns
+        ---
+        (grammar,report)
+        """
+        P: dict[str,list[list[str]]] = {k:list(self._P[k]) for k in self._P}
+        rulesBefore: int = CFG._rules(P)
+        nonterminalsBefore: int = len(P)
+        branchingBefore: int = CFG._branching(P)
+        P = CFG._dedupe(P)
+        duplicates: int = rulesBefore-CFG._rules(P)
+        P = CFG._removeUseless(P,self._S)
+        useless: int = rulesBefore-duplicates-CFG._rules(P)
+        factored: int = 0
+        if factor:
+            (P,factored,moreDuplicates,moreUseless) = CFG._leftFactor(P,self._S)
+            duplicates += moreDuplicates
+            useless += moreUseless
+        report = ReductionReport(rulesBefore,CFG._rules(P),nonterminalsBefore,len(P),duplicates,useless,
+                                 factored,branchingBefore,CFG._branching(P))
+        return CFG(P,self._S),report
+
+    @staticmethod
+    def _rules(P:dict[str,list[list[str]]]) -> int:
+        return sum(len(P[k]) for k in P)
+
+    @staticmethod
+    def _branching(P:dict[str,list[list[str]]]) -> int:
+        branching: int = 0
+        for k in P:
+            counts: dict[str,int] = dict()
+            for rule in P[k]:
+                if len(rule) > 0:
+                    counts[rule[0]] = counts.get(rule[0],0)+1
+            branching = max([branching,*counts.values()])
+        return branching
+
+    @staticmethod
+    def _dedupe(P:dict[str,list[list[str]]]) -> dict[str,list[list[str]]]:
+        """
+        Rules without duplicates, the first of the same rules is kept
+        """
+        result: dict[str,list[list[str]]] = dict()
+        for k in P:
+            seen: set[tuple[str, ...]] = set()
+            result[k] = list()
+            for rule in P[k]:
+                if tuple(rule) not in seen:
+                    seen.add(tuple(rule))
+                    result[k].append(rule)
+        return result
+
+    @staticmethod
+    def _removeUseless(P:dict[str,list[list[str]]], S:str) -> dict[str,list[list[str]]]:
+        """
+        Rules without the nonterminals generating no word and those not reachable from S
+        """
+        # The first symbol of a rule is a terminal
+        generating: set[str] = set()
+        changed: bool = True
+        while changed:
+            changed = False
+            for k in P:
+                if k not in generating and any(len(rule) > 0 and all(s in generating for s in rule[1:]) for rule in P[k]):
+                    generating.add(k)
+                    changed = True
+        useful: dict[str,list[list[str]]] = {k:[rule for rule in P[k] if all(s in generating for s in rule[1:])] for k in P if k in generating}
+        reachable: set[str] = {S}
+        work: list[str] = [S]
+        while work:
+            k = work.pop()
+            for rule in useful.get(k,[]):
+                for s in rule[1:]:
+                    if s not in reachable:
+                        reachable.add(s)
+                        work.append(s)
+        result: dict[str,list[list[str]]] = {k:useful[k] for k in useful if k in reachable}
+        if S not in result:# No word is derived
+            result[S] = list()
+        return result
+
+    @staticmethod
+    def _leftFactor(P:dict[str,list[list[str]]], S:str) -> tuple[dict[str,list[list[str]]], int, int, int]:
+        """
+        Left-factor the groups of rules of a nonterminal sharing a terminal one at a time
+
+        A factoring is kept only if neither the number of rules nor the branching increases
+        after the duplicates and the useless symbols are removed. The new nonterminals are not factored again.
+
+        Returns
+        ---
+        (rules,number of groups factored,duplicates removed,useless rules removed)
+        """
+        rules: int = CFG._rules(P)
+        branching: int = CFG._branching(P)
+        # New nonterminals by the rest of the factored rules
+        names: dict[tuple[tuple[str, ...], ...],str] = dict()
+        factored: int = 0
+        duplicates: int = 0
+        useless: int = 0
+        for k in list(P):
+            if k not in P:
+                continue
+            groups: dict[str,list[list[str]]] = dict()
+            for rule in P[k]:
+                if len(rule) > 1:# A -> a alone can not be factored in GNF
+                    groups.setdefault(rule[0],list()).append(rule)
+            for a in groups:
+                if len(groups[a]) == 1:
+                    continue
+                rest: tuple[tuple[str, ...], ...] = tuple(tuple(r[1:]) for r in groups[a])
+                candidate: dict[str,list[list[str]]] = dict(P)
+                if rest in names and names[rest] in P:# The same rules are already factored
+                    name: str = names[rest]
+                else:
+                    name = f"{k}'{a}"
+                    while name in P:
+                        name += "'"
+                    candidate[name] = [[*r, *alpha[1:]] for alpha in rest for r in P[alpha[0]] if len(r) > 0]
+                replaced: list[list[str]] = list()
+                for rule in P[k]:
+                    if len(rule) <= 1 or rule[0] != a:
+                        replaced.append(rule)
+                    elif rule is groups[a][0]:# The first rule of the group is replaced, the others removed
+                        replaced.append([a,name])
+                candidate[k] = replaced
+                deduped: dict[str,list[list[str]]] = CFG._dedupe(candidate)
+                reduced: dict[str,list[list[str]]] = CFG._removeUseless(deduped,S)
+                if CFG._rules(reduced) > rules or CFG._branching(reduced) > branching:
+                    continue
+                duplicates += CFG._rules(candidate)-CFG._rules(deduped)
+                useless += CFG._rules(deduped)-CFG._rules(reduced)
+                names[rest] = name
+                P = reduced
+                rules = CFG._rules(P)
+                branching = CFG._branching(P)
+                factored += 1
+                if k not in P:
+                    break
+        return P,factored,duplicates,useless
+
+    def accepts(self, word:Sequence[str]) -> bool:
+        """
+        True if word is derived from S, decided by the Earley parser
+        """
+        return self._earley().accepts(word)
+
+    def parse(self, word:Sequence[str]) -> ParseForest|None:
+        """
+        Shared packed parse forest of word, None if word is not derived from S
+        """
+        return self._earley().parse(word)
+
+    def save(self, path:str) -> None:
+        """
+        Save this grammar in the binary format, see serialize.py
+        """
+        import serialize
+        serialize.save(self,path)
+
+    def _earley(self) -> EarleyParser:
+        if self._parser is None:
+            self._parser = EarleyParser(self._P,self._S,self._N)
+        return self._parser
+
     @property
     def P(self) -> dict[str, list[list[str]]]:
         return self._P
@@ -0,0 +1,367 @@
+from array import array
+from collections import deque
+from stack import PStack, IntStack
+from budget import Budget, BudgetGuard
+
+
+class CompiledPDA:
+    """
+    PDA with interned symbols and flat transition tables
+
+    States, input symbols and stack symbols are numbered from 0; the input symbol 0 is
+    the empty string ''. The alternatives of the key (q,a,g) are the entries
+    start[k] to start[k+1]-1 of target, pushStart and pushLen where k = (q*nA+a)*nG+g.
+    The pushed symbols are kept in pool in the order they are pushed, the bottom first.
+    The tables are used as they are given, which may be a mapped file, and the pushed symbols
+    are sliced from pool when a transition is taken. Only the index of the input symbols,
+    the pushed symbols of the alternatives taken by the deterministic engine, the folds and
+    the summaries are built in each process, on their first use.
+    """
+
+    def __init__(self, states:list[str], alphabet:list[str], stackAlphabet:list[str], q_0:int, Z_0:int, F:array,
+                 deterministic:bool, start:array, target:array, pushStart:array, pushLen:array, pool:array) -> None:
+        self._states: list[str] = states
+        self._alphabet: list[str] = alphabet
+        self._stackAlphabet: list[str] = stackAlphabet
+        # Input symbols by name, built on the first use in each process
+        self._symbolIndex: dict[str,int]|None = None
+        self._q_0: int = q_0
+        self._Z_0: int = Z_0
+        self._F: array = F
+        self._deterministic: bool = deterministic
+        # NPDA without acceptance states accepts by empty stack in any state
+        self._acceptAll: bool = (not deterministic) and (not any(F))
+        self._nA: int = len(alphabet)
+        self._nG: int = len(stackAlphabet)
+        self._start: array = start
+        self._target: array = target
+        self._pushStart: array = pushStart
+        self._pushLen: array = pushLen
+        self._pool: array = pool
+        # Pushed symbols of the alternatives taken by the deterministic engine
+        self._pushes: dict[int,tuple[int, ...]] = dict()
+        # Transitions without input folded as DPDA.epsilonFold() and summarized as NPDA.epsilonSummaries()
+        self._epsilonFolds: dict[tuple[int,int],tuple[int,str|None]] = dict()
+        self._epsilonSummaries: dict[tuple[int,int],set[int]]|None = None
+
+    @staticmethod
+    def fromPda(pda, deterministic:bool) -> 'CompiledPDA':
+        """
+        Compile DPDA (deterministic is True) or NPDA (deterministic is False)
+        """
+        states: list[str] = sorted(pda.states | {pda.q_0} | set(pda.F))
+        alphabet: list[str] = [''] + sorted(pda.alphabet)
+        stackAlphabet: list[str] = sorted(pda.stackAlphabet | {pda.Z})
+        stateIndex = {s:i for i,s in enumerate(states)}
+        symbolIndex = {s:i for i,s in enumerate(alphabet)}
+        stackIndex = {s:i for i,s in enumerate(stackAlphabet)}
+        nA: int = len(alphabet)
+        nG: int = len(stackAlphabet)
+        alternatives: dict[int,list[tuple[str,list[str]]]] = dict()
+        for (q,a,g) in pda.delta:
+            k: int = (stateIndex[q]*nA+symbolIndex[a])*nG+stackIndex[g]
+            v = pda.delta[(q,a,g)]
+            alternatives[k] = v if not deterministic else [v]
+        start: array = array('i')
+        target: array = array('i')
+        pushStart: array = array('i')
+        pushLen: array = array('i')
+        pool: array = array('i')
+        for k in range(len(states)*nA*nG):
+            start.append(len(target))
+            for (p,Z) in alternatives.get(k,[]):
+                target.append(stateIndex[p])
+                pushStart.append(len(pool))
+                pushLen.append(len(Z))
+                pool.extend(stackIndex[z] for z in reversed(Z))
+        start.append(len(target))
+        F: array = array('b',(1 if s in pda.F else 0 for s in states))
+        return CompiledPDA(states,alphabet,stackAlphabet,stateIndex[pda.q_0],stackIndex[pda.Z],F,
+                           deterministic,start,target,pushStart,pushLen,pool)
+
+    def encode(self, input:str) -> list[int]:
+        """
+        Input symbols as integers, -1 for a symbol not in the alphabet
+        """
+        symbolIndex: dict[str,int] = self._symbols()
+        return [symbolIndex.get(s,-1) for s in input]
+
+    def _symbols(self) -> dict[str,int]:
+        if self._symbolIndex is None:
+            self._symbolIndex = {s:i for i,s in enumerate(self._alphabet)}
+        return self._symbolIndex
+
+    def key(self, q:int, a:int, g:int) -> tuple[str,str,str]:
+        """
+        Key of the transition function in the original symbols
+        """
+        return (self._states[q],self._alphabet[a],self._stackAlphabet[g])
+
+    def accepts(self, input:str) -> tuple[bool, str]:
+        """
+        Process an input, the result is the same as accepts() of the original PDA
+
+        Returns
+        ---
+        (result,message)
+        """
+        if self._deterministic:
+            return self._acceptsDeterministic(input)
+        return self._acceptsNondeterministic(input)
+
+    def _acceptsDeterministic(self, input:str) -> tuple[bool, str]:
+        symbolIndex: dict[str,int] = self._symbols()
+        start, target, pushStart, pushLen, pool = self._start, self._target, self._pushStart, self._pushLen, self._pool
+        pushes: dict[int,tuple[int, ...]] = self._pushes
+        nA: int = self._nA
+        nG: int = self._nG
+        q: int = self._q_0
+        stack: list[int] = [self._Z_0]
+        for s in input:
+            if len(stack) == 0:# stack is empty
+                return False,'vacant stack'
+            g: int = stack.pop()
+            a: int = symbolIndex.get(s,0)
+            if a == 0:# not in the alphabet
+                return False,f'delta({(self._states[q],s,self._stackAlphabet[g])}) is not defined'
+            k: int = (q*nA+a)*nG+g
+            b: int = start[k]
+            if b == start[k+1]:
+                return False,f'delta({self.key(q,a,g)}) is not defined'
+            q = target[b]
+            Z: tuple[int, ...]|None = pushes.get(b)
+            if Z is None:
+                Z = pushes[b] = tuple(pool[pushStart[b]:pushStart[b]+pushLen[b]])
+            stack.extend(Z)
+        while len(stack) > 0:# Transitions without input, folded for each symbol of the stack
+            (q,message) = self._epsilonFold(q,stack.pop())
+            if message is not None:
+                return False,message
+        if not self._F[q]:
+            return False,f'stop at {self._states[q]}'
+        return True,'accepted'
+
+    def _epsilonFold(self, q:int, g:int) -> tuple[int, str|None]:
+        """
+        DPDA.epsilonFold() on the tables
+
+        Returns
+        ---
+        (p,None) if g is popped at state p, (-1,message) if the chain stops or loops forever
+        """
+        folds = self._epsilonFolds
+        if (q,g) in folds:
+            return folds[(q,g)]
+        start, target, pushStart, pushLen, pool = self._start, self._target, self._pushStart, self._pushLen, self._pool
+        nG: int = self._nG
+        # Chains being folded: [(q,g), current state, pushed symbols from the top, number of symbols already popped]
+        work: list[list] = list()
+        onPath: set[tuple[int,int]] = set()
+        key: tuple[int,int] = (q,g)
+        while True:
+            k: int = key[0]*self._nA*nG+key[1]
+            if key in folds:
+                (p,message) = folds[key]
+            elif key in onPath:
+                (p,message) = (-1,f'epsilon cycle at {self.key(key[0],0,key[1])}')
+            elif start[k] == start[k+1]:
+                (p,message) = (-1,f'delta({self.key(key[0],0,key[1])}) is not defined')
+                folds[key] = (p,message)
+            else:
+                b: int = start[k]
+                if pushLen[b] > 0:# Start to fold the chain of key
+                    pushed = pool[pushStart[b]:pushStart[b]+pushLen[b]]
+                    onPath.add(key)
+                    work.append([key,target[b],pushed[::-1],0])
+                    key = (target[b],pushed[-1])
+                    continue
+                (p,message) = (target[b],None)# key is popped at once
+                folds[key] = (p,message)
+            if p < 0:# The chains on the path stop in the same way, a chain on the cycle loops at its own key
+                inCycle: bool = False
+                for frame in work:
+                    inCycle = inCycle or frame[0] == key
+                    folds[frame[0]] = (-1,f'epsilon cycle at {self.key(frame[0][0],0,frame[0][1])}' if inCycle else message)
+                return folds[(q,g)] if (q,g) in folds else (-1,message)
+            # key is popped at p, then the next pushed symbol of the chain is popped
+            while len(work) > 0:
+                frame = work[-1]
+                frame[1] = p
+                frame[3] += 1
+                if frame[3] < len(frame[2]):
+                    break
+                work.pop()
+                onPath.discard(frame[0])
+                folds[frame[0]] = (p,None)
+            if len(work) == 0:
+                return folds[(q,g)]
+            key = (work[-1][1],work[-1][2][work[-1][3]])
+
+    def _summaries(self) -> dict[tuple[int,int],set[int]]:
+        """
+        NPDA.epsilonSummaries() on the tables
+        """
+        if self._epsilonSummaries is not None:
+            return self._epsilonSummaries
+        start, target, pushStart, pushLen, pool = self._start, self._target, self._pushStart, self._pushLen, self._pool
+        nA: int = self._nA
+        nG: int = self._nG
+        epsilon: list[tuple[int,int]] = [(q,g) for q in range(len(self._states)) for g in range(nG)
+                                         if start[q*nA*nG+g] < start[q*nA*nG+g+1]]
+        summaries: dict[tuple[int,int],set[int]] = dict()
+        changed: bool = True
+        while changed:
+            changed = False
+            for (q,g) in epsilon:
+                result: set[int] = summaries.setdefault((q,g),set())
+                k: int = q*nA*nG+g
+                for b in range(start[k],start[k+1]):
+                    states: set[int] = {target[b]}
+                    for z in reversed(pool[pushStart[b]:pushStart[b]+pushLen[b]]):# from the top
+                        states = {s for p in states for s in summaries.get((p,z),())}
+                        if len(states) == 0:
+                            break
+                    if not states <= result:
+                        result |= states
+                        changed = True
+        self._epsilonSummaries = summaries
+        return summaries
+
+    def _acceptsNondeterministic(self, input:str) -> tuple[bool, str]:
+        """
+        Breadth-first search as NPDA.accepts(), the transitions without input at the end of the input are decided by the summaries
+        """
+        start, target, pushStart, pushLen, pool = self._start, self._target, self._pushStart, self._pushLen, self._pool
+        nA: int = self._nA
+        nG: int = self._nG
+        word: list[int] = self.encode(input)
+        n: int = len(word)
+        first: tuple[int,int,PStack[int]] = (self._q_0,0,PStack([self._Z_0]))
+        seen: set[tuple[int,int,PStack[int]]] = {first}
+        queue: deque[tuple[int,int,PStack[int]]] = deque([first])
+        summaries: dict[tuple[int,int],set[int]] = self._summaries()
+        while queue:
+            (q,pos,stack) = queue.popleft()
+            if pos == n:# No more input, the stack is popped by the summaries
+                states: set[int] = {q}
+                for g in stack:
+                    states = {s for p in states for s in summaries.get((p,g),())}
+                    if len(states) == 0:
+                        break
+                if len(states) > 0 and (self._acceptAll or any(self._F[p] for p in states)):
+                    return True,'accepted'
+                continue
+            if stack.is_empty():# stack is empty
+                continue
+            (g,rest) = stack.pop()
+            a: int = word[pos]
+            if a < 0:# not in the alphabet
+                continue
+            nextPos: int = pos+1
+            k: int = (q*nA+a)*nG+g
+            for b in range(start[k],start[k+1]):
+                s: PStack[int] = rest
+                for z in pool[pushStart[b]:pushStart[b]+pushLen[b]]:
+                    s = s.push(z)
+                c = (target[b],nextPos,s)
+                if c not in seen:
+                    seen.add(c)
+                    queue.append(c)
+        return False,'no accepting run'
+
+    def acceptsBacktracking(self, input:str, budget:Budget|None = None) -> tuple[bool, str]:
+        """
+        Depth-first search backtracking on one IntStack, the result is the same as NPDA.accepts()
+
+        The alternatives are explored in the order of delta and the stack is restored by rollback()
+        instead of being copied for each branch. Only the configurations with alternatives left
+        to explore are kept. The transitions without input at the end of the input are decided
+        by the summaries as in NPDA.accepts(), so that the search ends even if they loop forever.
+
+        Returns
+        ---
+        (result,message) where message is 'budget exceeded: reason' if a limit of budget is exceeded
+        """
+        start, target, pushStart, pushLen, pool = self._start, self._target, self._pushStart, self._pushLen, self._pool
+        nA: int = self._nA
+        nG: int = self._nG
+        word: list[int] = self.encode(input)
+        n: int = len(word)
+        stack: IntStack = IntStack([self._Z_0])
+        guard: BudgetGuard|None = None if budget is None else budget.guard()
+        pruned: bool = False# some configurations are higher than maxHeight
+        # Alternatives left of the branching configurations, the i-th has the i-th mark of stack
+        nextAlternative: array = array('i')
+        endAlternative: array = array('i')
+        nextPos: array = array('i')
+        summaries: dict[tuple[int,int],set[int]] = self._summaries()
+        q: int = self._q_0
+        pos: int = 0
+        while True:
+            b: int = -1# alternative taken next
+            reason: str|None = None if guard is None else guard.check(stack.size(),len(nextAlternative))
+            if reason == 'height':
+                pruned = True
+            elif reason is not None:
+                return False,f'budget exceeded: {reason}'
+            elif pos == n:# No more input, the stack is popped by the summaries
+                states: set[int] = {q}
+                for g in stack:
+                    states = {s for p in states for s in summaries.get((p,g),())}
+                    if len(states) == 0:
+                        break
+                if len(states) > 0 and (self._acceptAll or any(self._F[p] for p in states)):
+                    return True,'accepted'
+            elif not stack.is_empty():
+                g = stack.pop()
+                a: int = word[pos]
+                if a >= 0:# in the alphabet
+                    k: int = (q*nA+a)*nG+g
+                    b = start[k]
+                    if b == start[k+1]:
+                        b = -1
+                    elif b+1 < start[k+1]:# Other alternatives are explored later
+                        stack.mark()
+                        nextAlternative.append(b+1)
+                        endAlternative.append(start[k+1])
+                        nextPos.append(pos+1)
+                    pos += 1
+            if b < 0:# Backtrack to the last configuration with alternatives left
+                depth: int = len(nextAlternative)-1
+                if depth < 0:
+                    break
+                b = nextAlternative[depth]
+                stack.rollback(depth)
+                pos = nextPos[depth]
+                if b+1 == endAlternative[depth]:# The last alternative
+                    stack.release(depth)
+                    del nextAlternative[depth], endAlternative[depth], nextPos[depth]
+                else:
+                    nextAlternative[depth] = b+1
+            q = target[b]
+            stack.pushAll(pool[pushStart[b]:pushStart[b]+pushLen[b]])
+        if pruned:
+            return False,'budget exceeded: height'
+        return False,'no accepting run'
+
+    def tables(self) -> tuple[int,int,array,array,array,array,array,array]:
+        """
+        (q_0,Z_0,F,start,target,pushStart,pushLen,pool)
+        """
+        return (self._q_0,self._Z_0,self._F,self._start,self._target,self._pushStart,self._pushLen,self._pool)
+
+    @property
+    def states(self) -> list[str]:
+        return self._states
+
+    @property
+    def alphabet(self) -> list[str]:
+        return self._alphabet
+
+    @property
+    def stackAlphabet(self) -> list[str]:
+        return self._stackAlphabet
+
+    @property
+    def deterministic(self) -> bool:
+        return self._deterministic
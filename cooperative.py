@@ -0,0 +1,69 @@
+"""
+Running searches of PDA cooperatively in asyncio
+
+A search is written as a generator which yields nothing every some configurations and
+returns its result. drive() runs it in the event loop, giving control back to the loop at each yield,
+or in an executor, checking cancellation at each yield. Either way the search stops
+when the awaiting task is cancelled, by asyncio.timeout() or asyncio.wait_for() for example.
+"""
+import asyncio
+import threading
+from concurrent.futures import Executor
+from typing import Generator, TypeVar
+
+T = TypeVar("T")
+
+# Number of configurations explored between two yields unless another one is given
+YIELD_EVERY: int = 1024
+
+
+def complete(steps:Generator[None,None,T]) -> T:
+    """
+    Run a search to the end without yielding
+    """
+    try:
+        while True:
+            next(steps)
+    except StopIteration as e:
+        return e.value
+
+
+def _completeUnless(steps:Generator[None,None,T], stop:threading.Event) -> T|None:
+    """
+    Run a search to the end, None if stop is set
+    """
+    try:
+        while True:
+            next(steps)
+            if stop.is_set():
+                steps.close()
+                return None
+    except StopIteration as e:
+        return e.value
+
+
+async def drive(steps:Generator[None,None,T], executor:Executor|None = None) -> T:
+    """
+    Run a search without blocking the event loop
+
+    Parameters
+    ---
+    steps Search yielding every some configurations
+
+    executor Thread pool running the search, the search runs in the event loop if None
+    """
+    if executor is not None:
+        stop: threading.Event = threading.Event()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor,_completeUnless,steps,stop)# type: ignore[return-value]
+        except asyncio.CancelledError:
+            stop.set()
+            raise
+    try:
+        while True:
+            next(steps)
+            await asyncio.sleep(0)
+    except StopIteration as e:
+        return e.value
+    finally:
+        steps.close()
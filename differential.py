@@ -0,0 +1,193 @@
+"""
+Differential checks of the engines on random automata
+
+Each check runs an engine and the reference engine on the same random automata and inputs
+from a fixed seed, and fails with the first input on which they differ.
+
+    python differential.py
+    python differential.py --seed 1 --only vectorized
+"""
+import argparse
+import itertools
+import random
+import sys
+from typing import Callable, Iterator
+from pda import DPDA, NPDA
+from cfg import CFG
+from budget import Budget, BudgetExceeded
+from cache import ConversionCache
+
+
+################################################################
+# Random automata and inputs
+STATES = ['q_0','q_1','q_2']
+STACK = ['Z','A','B']
+# Budget of the searches on automata with epsilon cycles, smaller than DEFAULT_BUDGET to keep the checks short
+SEARCH_BUDGET = Budget(maxSteps=5000,maxBranches=1000)
+# Conversions are checked without the cache
+NOCACHE = ConversionCache(enabled=False)
+
+def randomDpda(r:random.Random, transitions:int = 10, maxPush:int = 3) -> DPDA:
+    """
+    Random DPDA over {a,b}, whose transitions without input may loop forever
+    """
+    delta:dict[tuple[str,str,str],tuple[str,list[str]]] = dict()
+    for _ in range(transitions):
+        f = (r.choice(STATES),r.choice(['a','b','']),r.choice(STACK))
+        delta[f] = (r.choice(STATES),[r.choice(STACK) for _ in range(r.randint(0,maxPush))])
+    return DPDA('q_0',delta,{r.choice(STATES)},'Z')
+
+
+def randomNpda(r:random.Random, transitions:int = 10, maxPush:int = 3, epsilon:bool = True) -> NPDA:
+    """
+    Random NPDA over {a,b}, accepting by empty stack with probability 1/2
+    """
+    delta:dict[tuple[str,str,str],list[tuple[str,list[str]]]] = dict()
+    for _ in range(transitions):
+        f = (r.choice(STATES),r.choice(['a','b','']) if epsilon else r.choice('ab'),r.choice(STACK))
+        delta.setdefault(f,[]).append((r.choice(STATES),[r.choice(STACK) for _ in range(r.randint(0,maxPush))]))
+    return NPDA('q_0',delta,set() if r.random() < 0.5 else {r.choice(STATES)},'Z')
+
+
+def words(alphabet:str, n:int) -> Iterator[str]:
+    """
+    All the words of length n or less
+    """
+    for k in range(n+1):
+        for w in itertools.product(alphabet,repeat=k):
+            yield ''.join(w)
+
+
+################################################################
+# Checks
+def checkVectorized(r:random.Random, automata:int) -> str:
+    """
+    VectorizedDPDA.accepts() and CompiledPDA.accepts() against DPDA.accepts()
+    """
+    try:
+        import numpy# noqa: F401
+    except ImportError:
+        return 'skipped, NumPy is not installed'
+    inputs: list[str] = list(words('ab',5))
+    cycles: int = 0
+    for i in range(automata):
+        dpda: DPDA = randomDpda(r)
+        expected: list[tuple[bool, str]] = [dpda.accepts(w) for w in inputs]
+        vectorized: list[tuple[bool, str]] = dpda.vectorize().accepts(inputs)
+        compiled = dpda.compile()
+        for (w,e,v) in zip(inputs,expected,vectorized):
+            assert v == e,(i,dpda.delta,w,e,v)
+            assert compiled.accepts(w) == e,(i,dpda.delta,w,e,compiled.accepts(w))
+        cycles += sum(1 for e in expected if e[1].startswith('epsilon cycle'))
+    return f'{automata} automata, {cycles} inputs ending in epsilon cycles'
+
+
+def checkParallel(r:random.Random, automata:int) -> str:
+    """
+    NPDA.findAcceptingRunParallel() against NPDA.accepts()
+    """
+    inputs: list[str] = list(words('ab',3))
+    accepted: int = 0
+    exceeded: int = 0
+    for i in range(max(automata//10,1)):# A process pool is started for each input
+        npda: NPDA = randomNpda(r,18,2)
+        for w in inputs:
+            expected: bool = npda.accepts(w)[0]
+            try:
+                (trace,_) = npda.findAcceptingRunParallel(w,workers=2)
+            except BudgetExceeded:
+                exceeded += 1
+                continue
+            assert (trace is not None) == expected,(i,npda.delta,npda.F,w,expected)
+            accepted += expected
+    return f'{max(automata//10,1)} automata, {accepted} inputs accepted, {exceeded} over the budget'
+
+
+def checkToCfg(r:random.Random, automata:int) -> str:
+    """
+    CFG.accepts() of NPDA.toCfg() against NPDA.accepts() on NPDA accepting by empty stack without transitions without input
+    """
+    inputs: list[str] = list(words('ab',6))
+    accepted: int = 0
+    for i in range(automata):
+        npda: NPDA = randomNpda(r,30,3,epsilon=False)
+        npda = NPDA(npda.q_0,npda.delta,set(),npda.Z)
+        cfg: CFG = npda.toCfg(cache=NOCACHE)
+        for w in inputs:
+            expected: bool = npda.accepts(w)[0]
+            assert cfg.accepts(w) == expected,(i,npda.delta,w,expected)
+            accepted += expected
+    return f'{automata} automata, {accepted} inputs accepted'
+
+
+def checkSummaries(r:random.Random, automata:int) -> str:
+    """
+    NPDA.accepts(), deciding the end of the input by the summaries, against the breadth-first NPDA.findAcceptingRun()
+    """
+    inputs: list[str] = list(words('ab',4))
+    accepted: int = 0
+    exceeded: int = 0
+    for i in range(automata):
+        npda: NPDA = randomNpda(r,18,2)
+        for w in inputs:
+            expected: bool = npda.accepts(w)[0]
+            try:
+                (trace,_) = npda.findAcceptingRun(w,budget=SEARCH_BUDGET)
+            except BudgetExceeded:
+                exceeded += 1
+                continue
+            assert (trace is not None) == expected,(i,npda.delta,npda.F,w,expected)
+            accepted += expected
+    return f'{automata} automata, {accepted} inputs accepted, {exceeded} over the budget'
+
+
+def checkGss(r:random.Random, automata:int) -> str:
+    """
+    GSSRecognizer against NPDA.accepts(), acceptsNow() on every prefix and no accepted extension of a dead prefix
+    """
+    extensions: list[str] = list(words('ab',4))
+    dead: int = 0
+    for i in range(automata):
+        npda: NPDA = randomNpda(r,18,2)
+        for w in words('ab',4):
+            recognizer = npda.recognizer()
+            for j,s in enumerate(w):
+                assert recognizer.acceptsNow() == npda.accepts(w[:j])[0],(i,npda.delta,npda.F,w[:j])
+                if not recognizer.feed(s):
+                    break
+            if recognizer.dead:
+                prefix: str = w[:recognizer.deadAt]
+                assert not any(npda.accepts(prefix+x)[0] for x in extensions),(i,npda.delta,npda.F,prefix)
+                dead += 1
+            else:
+                assert recognizer.acceptsNow() == npda.accepts(w)[0],(i,npda.delta,npda.F,w)
+    return f'{automata} automata, {dead} dead prefixes'
+
+
+CHECKS: dict[str,Callable[[random.Random,int],str]] = {
+    'vectorized':checkVectorized,
+    'parallel':checkParallel,
+    'toCfg':checkToCfg,
+    'summaries':checkSummaries,
+    'gss':checkGss,
+}
+
+
+def run(seed:int, automata:int, only:str|None) -> None:
+    for name,check in CHECKS.items():
+        if only is not None and only not in name:
+            continue
+        print(f'{name}: {check(random.Random(seed),automata)}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Differential checks of the engines on random automata')
+    parser.add_argument('--seed',type=int,default=0,help='seed of the random automata')
+    parser.add_argument('--automata',type=int,default=200,help='number of automata of each check')
+    parser.add_argument('--only',help='run the checks whose name contains this string')
+    args = parser.parse_args()
+    try:
+        run(args.seed,args.automata,args.only)
+    except AssertionError as e:
+        print(f'FAILED: {e}',file=sys.stderr)
+        sys.exit(1)
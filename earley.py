@@ -0,0 +1,263 @@
+from typing import Sequence, Iterator
+
+
+class ForestNode:
+    """
+    Node of a shared packed parse forest
+
+    label is a symbol for a symbol node and (A,r,d) for an intermediate node,
+    which stands for the first d symbols of the r-th rule of A.
+    Each element of families is an alternative derivation of the node given by its children.
+    """
+    __slots__ = ('label', 'start', 'end', 'families')
+
+    def __init__(self, label:str|tuple[str,int,int], start:int, end:int) -> None:
+        self.label: str|tuple[str,int,int] = label
+        self.start: int = start
+        self.end: int = end
+        self.families: list[tuple['ForestNode', ...]] = list()
+
+    def isSymbol(self) -> bool:
+        return isinstance(self.label, str)
+
+    def __str__(self) -> str:
+        return f'({self.label},{self.start},{self.end})'
+
+
+class ParseForest:
+    """
+    Shared packed parse forest of an input, the result of EarleyParser.parse()
+    """
+
+    def __init__(self, root:ForestNode, nodes:dict[tuple[str|tuple[str,int,int],int,int],ForestNode]) -> None:
+        self._root: ForestNode = root
+        self._nodes: dict[tuple[str|tuple[str,int,int],int,int],ForestNode] = nodes
+
+    def count(self) -> int:
+        """
+        Number of derivations
+
+        ValueError is raised if the grammar derives the input in infinitely many ways.
+        """
+        counts: dict[ForestNode,int] = dict()
+        onPath: set[ForestNode] = {self._root}
+        work: list[tuple[ForestNode,Iterator[ForestNode]]] = [(self._root,self._children(self._root))]
+        while work:
+            (node,children) = work[-1]
+            child: ForestNode|None = next(children,None)
+            if child is None:
+                work.pop()
+                onPath.discard(node)
+                total: int = 1 if len(node.families) == 0 else 0# terminal
+                for family in node.families:
+                    c: int = 1
+                    for ch in family:
+                        c *= counts[ch]
+                    total += c
+                counts[node] = total
+            elif child in onPath:
+                raise ValueError('infinitely many derivations')
+            elif child not in counts:
+                onPath.add(child)
+                work.append((child,self._children(child)))
+        return counts[self._root]
+
+    def tree(self) -> tuple:
+        """
+        One of the derivations as nested tuples (symbol, child, ...), a terminal is given as a string
+        """
+        # Choose for every node a family whose children are already resolved
+        resolved: dict[ForestNode,tuple[ForestNode, ...]] = dict()
+        nodes: list[ForestNode] = list(self._nodes.values())
+        changed: bool = True
+        while changed:
+            changed = False
+            for node in nodes:
+                if node in resolved:
+                    continue
+                if len(node.families) == 0 and node.isSymbol():# terminal
+                    resolved[node] = ()
+                    changed = True
+                    continue
+                for family in node.families:
+                    if all(ch in resolved for ch in family):
+                        resolved[node] = family
+                        changed = True
+                        break
+        return ParseForest._build(self._root,resolved)
+
+    @staticmethod
+    def _build(root:ForestNode, resolved:dict[ForestNode,tuple[ForestNode, ...]]) -> tuple:
+        result: dict[ForestNode,tuple|str] = dict()
+        work: list[tuple[ForestNode,bool]] = [(root,False)]
+        while work:
+            (node,done) = work.pop()
+            if node in result:
+                continue
+            if len(node.families) == 0:# terminal
+                result[node] = node.label# type: ignore[assignment]
+                continue
+            children: list[ForestNode] = list()
+            inter: ForestNode = resolved[node][0]
+            while len(resolved[inter]) > 0:# Intermediate nodes are followed from the last symbol
+                (inter,right) = resolved[inter]
+                children.append(right)
+            children.reverse()
+            if done:
+                result[node] = (node.label,*[result[ch] for ch in children])
+                continue
+            work.append((node,True))
+            for ch in children:
+                if ch not in result:
+                    work.append((ch,False))
+        return result[root]# type: ignore[return-value]
+
+    @staticmethod
+    def _children(node:ForestNode) -> Iterator[ForestNode]:
+        for family in node.families:
+            yield from family
+
+    @property
+    def root(self) -> ForestNode:
+        return self._root
+
+    @property
+    def nodes(self) -> dict[tuple[str|tuple[str,int,int],int,int],ForestNode]:
+        return self._nodes
+
+
+class EarleyParser:
+    """
+    Earley parser of a context free grammar
+
+    A symbol is a nonterminal if it has production rules or appears after the first symbol of a rule.
+    The empty string '' in a rule is regarded as the empty word.
+    """
+
+    def __init__(self, P:dict[str,list[list[str]]], S:str, N:set[str]|None = None) -> None:
+        self._S: str = S
+        self._rules: dict[str,list[tuple[str, ...]]] = dict()
+        for k in P:
+            self._rules[k] = [tuple(s for s in rule if s != '') for rule in P[k]]
+        self._nonterminals: set[str] = set(P.keys()) | (N or set()) | {S}
+        for k in self._nonterminals:
+            self._rules.setdefault(k,[])
+        self._nullable: set[str] = self._findNullable()
+
+    def _findNullable(self) -> set[str]:
+        nullable: set[str] = set()
+        changed: bool = True
+        while changed:
+            changed = False
+            for k in self._rules:
+                if k in nullable:
+                    continue
+                for rule in self._rules[k]:
+                    if all(s in nullable for s in rule):
+                        nullable.add(k)
+                        changed = True
+                        break
+        return nullable
+
+    def accepts(self, word:Sequence[str]) -> bool:
+        """
+        True if the grammar derives word
+        """
+        return self._accepted(self._recognize(word))
+
+    def parse(self, word:Sequence[str]) -> ParseForest|None:
+        """
+        Shared packed parse forest of word, None if the grammar does not derive word
+        """
+        chart = self._recognize(word)
+        if not self._accepted(chart):
+            return None
+        n: int = len(word)
+        itemSets: list[set[tuple[str,int,int,int]]] = [set(items) for items in chart]
+        # starts[j][A]: origins of the completed items of A in the j-th set
+        starts: list[dict[str,set[int]]] = [dict() for _ in range(n+1)]
+        for j in range(n+1):
+            for (A,r,d,i) in chart[j]:
+                if d == len(self._rules[A][r]):
+                    starts[j].setdefault(A,set()).add(i)
+        nodes: dict[tuple[str|tuple[str,int,int],int,int],ForestNode] = dict()
+        work: list[ForestNode] = list()
+
+        def node(label:str|tuple[str,int,int], i:int, j:int) -> ForestNode:
+            key = (label,i,j)
+            if key not in nodes:
+                nodes[key] = ForestNode(label,i,j)
+                work.append(nodes[key])
+            return nodes[key]
+
+        root: ForestNode = node(self._S,0,n)
+        while work:
+            v: ForestNode = work.pop()
+            (i,j) = (v.start,v.end)
+            if isinstance(v.label,str):# symbol node
+                if v.label not in self._nonterminals:
+                    continue
+                for r,rule in enumerate(self._rules[v.label]):
+                    if (v.label,r,len(rule),i) in itemSets[j]:
+                        v.families.append((node((v.label,r,len(rule)),i,j),))
+                continue
+            (A,r,d) = v.label# intermediate node
+            if d == 0:
+                v.families.append(())
+                continue
+            X: str = self._rules[A][r][d-1]
+            if X in self._nonterminals:
+                ks: set[int] = starts[j].get(X,set())
+            else:
+                ks = {j-1} if j > i and word[j-1] == X else set()
+            for k in sorted(ks):
+                if k >= i and (A,r,d-1,i) in itemSets[k]:
+                    v.families.append((node((A,r,d-1),i,k),node(X,k,j)))
+        return ParseForest(root,nodes)
+
+    def _accepted(self, chart:list[list[tuple[str,int,int,int]]]) -> bool:
+        return any(d == len(self._rules[A][r]) for (A,r,d,i) in chart[-1] if A == self._S and i == 0)
+
+    def _recognize(self, word:Sequence[str]) -> list[list[tuple[str,int,int,int]]]:
+        """
+        Earley sets, an item (A,r,d,i) is the r-th rule of A with the dot at d started at i
+        """
+        n: int = len(word)
+        chart: list[list[tuple[str,int,int,int]]] = [list() for _ in range(n+1)]
+        seen: list[set[tuple[str,int,int,int]]] = [set() for _ in range(n+1)]
+        # waiting[j][X]: items in the j-th set expecting X
+        waiting: list[dict[str,list[tuple[str,int,int,int]]]] = [dict() for _ in range(n+1)]
+        rules = self._rules
+        nonterminals = self._nonterminals
+        nullable = self._nullable
+
+        def add(j:int, item:tuple[str,int,int,int]) -> None:
+            if item not in seen[j]:
+                seen[j].add(item)
+                chart[j].append(item)
+                rule = rules[item[0]][item[1]]
+                if item[2] < len(rule):
+                    waiting[j].setdefault(rule[item[2]],[]).append(item)
+
+        for r in range(len(rules[self._S])):
+            add(0,(self._S,r,0,0))
+        for j in range(n+1):
+            items = chart[j]
+            k: int = 0
+            while k < len(items):
+                (A,r,d,i) = items[k]
+                k += 1
+                rule = rules[A][r]
+                if d < len(rule):
+                    X: str = rule[d]
+                    if X in nonterminals:# predict
+                        for r2 in range(len(rules[X])):
+                            add(j,(X,r2,0,j))
+                        if X in nullable:
+                            add(j,(A,r,d+1,i))
+                    elif j < n and word[j] == X:# scan
+                        add(j+1,(A,r,d+1,i))
+                else:# complete
+                    for (B,r2,d2,i2) in list(waiting[i].get(A,[])):
+                        add(j,(B,r2,d2+1,i2))
+        return chart
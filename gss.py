@@ -0,0 +1,172 @@
+from typing import TYPE_CHECKING, Iterable
+if TYPE_CHECKING:
+    from pda import NPDA
+
+
+class GSSNode:
+    """
+    Node of a graph-structured stack
+
+    A node holds a stack symbol and the nodes right below it, so that the stacks sharing
+    the symbols below are shared. The bottom node has no symbol.
+    viable is the set of states from which the stack through this node can still be emptied
+    by reading some input, and ending the set of states from which it is emptied after the end of the input.
+    """
+    __slots__ = ('symbol', 'below', 'index', 'viable', 'ending')
+
+    def __init__(self, symbol:str|None, below:set['GSSNode'], index:int) -> None:
+        self.symbol: str|None = symbol
+        self.below: set[GSSNode] = below
+        self.index: int = index# nodes below have smaller indices
+        self.viable: set[str] = set()
+        self.ending: set[str] = set()
+
+    def __str__(self) -> str:
+        return f'({self.symbol},{self.index})'
+
+
+class GSSRecognizer:
+    """
+    Incremental recognizer of NPDA over a streamed input
+
+    The live configurations (state, top node) share their stacks in a graph-structured stack.
+    Configurations which can no longer lead to acceptance whatever follows are removed,
+    so that the prefix read so far is dead exactly when no configuration remains.
+    """
+
+    def __init__(self, npda:'NPDA') -> None:
+        self._delta = npda.delta
+        self._epsilon: dict[tuple[str,str],set[str]] = npda.epsilonSummaries()
+        (self._inputOnly,self._mixed) = npda.popSummaries()
+        # States having a summary with each stack top
+        self._statesByTop: dict[str,set[str]] = dict()
+        for (q,g) in list(self._mixed)+list(self._inputOnly):
+            self._statesByTop.setdefault(g,set()).add(q)
+        F: set[str] = npda.F
+        final: set[str] = set(F) if len(F) > 0 else npda.states | {npda.q_0}
+        self._nodes: int = 0
+        bottom: GSSNode = self._node(None,set())
+        bottom.viable = final
+        bottom.ending = final
+        top: GSSNode = self._node(npda.Z,{bottom})
+        self._finalize([top])
+        self._configurations: set[tuple[str,GSSNode]] = set()
+        if npda.q_0 in top.viable:
+            self._configurations.add((npda.q_0,top))
+        self._position: int = 0
+        self._deadAt: int|None = 0 if len(self._configurations) == 0 else None
+
+    def _node(self, symbol:str|None, below:set[GSSNode]) -> GSSNode:
+        node = GSSNode(symbol,below,self._nodes)
+        self._nodes += 1
+        return node
+
+    def _finalize(self, nodes:list[GSSNode]) -> None:
+        """
+        Compute viable and ending of new nodes, the nodes below them are already finalized or earlier in nodes
+        """
+        for node in sorted(nodes,key=lambda n: n.index):
+            g: str = node.symbol# type: ignore[assignment]
+            viableBelow: set[str] = set().union(*(b.viable for b in node.below))
+            endingBelow: set[str] = set().union(*(b.ending for b in node.below))
+            for q in self._statesByTop.get(g,()):
+                if not self._inputOnly.get((q,g),set()).isdisjoint(viableBelow) \
+                        or not self._mixed.get((q,g),set()).isdisjoint(endingBelow):
+                    node.viable.add(q)
+                if not self._epsilon.get((q,g),set()).isdisjoint(endingBelow):
+                    node.ending.add(q)
+
+    def feed(self, symbol:str) -> bool:
+        """
+        Read a symbol
+
+        Returns
+        ---
+        False if the prefix read so far is dead, no continuation is accepted
+        """
+        if self._deadAt is not None:
+            return False
+        self._position += 1
+        delta = self._delta
+        configurations: set[tuple[str,GSSNode]] = set()
+        # Nodes pushed in this step by (state, pushed symbols), the bottom of the pushed symbols is the first
+        pushed: dict[tuple[str,tuple[str, ...]],tuple[GSSNode,GSSNode]] = dict()
+        for (q,node) in self._configurations:
+            f: tuple[str,str,str] = (q,symbol,node.symbol)# type: ignore[assignment]
+            if node.symbol is None or f not in delta:
+                continue
+            for (p,Z) in delta[f]:
+                if len(Z) == 0:
+                    for b in node.below:
+                        if p in b.viable:
+                            configurations.add((p,b))
+                    continue
+                key: tuple[str,tuple[str, ...]] = (p,tuple(Z))
+                if key in pushed:# the same symbols pushed on other stacks are merged
+                    pushed[key][0].below |= node.below
+                    continue
+                lowest: GSSNode = self._node(Z[-1],set(node.below))
+                top: GSSNode = lowest
+                for z in reversed(Z[:-1]):
+                    top = self._node(z,{top})
+                pushed[key] = (lowest,top)
+        created: list[GSSNode] = list()
+        for (lowest,top) in pushed.values():
+            node = top
+            created.append(node)
+            while node is not lowest:
+                node = next(iter(node.below))
+                created.append(node)
+        self._finalize(created)
+        for ((p,_),(_,top)) in pushed.items():
+            if p in top.viable:
+                configurations.add((p,top))
+        self._configurations = configurations
+        if len(configurations) == 0:
+            self._deadAt = self._position
+            return False
+        return True
+
+    def feedMany(self, symbols:Iterable[str]) -> bool:
+        """
+        Read symbols in turn, stopping at a dead prefix
+        """
+        for s in symbols:
+            if not self.feed(s):
+                return False
+        return self._deadAt is None
+
+    def acceptsNow(self) -> bool:
+        """
+        True if the prefix read so far is accepted
+        """
+        return any(q in node.ending for (q,node) in self._configurations)
+
+    @property
+    def dead(self) -> bool:
+        return self._deadAt is not None
+
+    @property
+    def deadAt(self) -> int|None:
+        """
+        Length of the shortest dead prefix, None if the prefix is not dead
+        """
+        return self._deadAt
+
+    @property
+    def position(self) -> int:
+        """
+        Number of symbols read
+        """
+        return self._position
+
+    @property
+    def configurations(self) -> set[tuple[str,GSSNode]]:
+        return self._configurations
+
+    @property
+    def nodes(self) -> int:
+        """
+        Number of nodes created
+        """
+        return self._nodes
@@ -0,0 +1,83 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+# hook(q,pos,height,f,branches): a configuration is expanded by the transition key f into branches alternatives
+Hook = Callable[[str,int,int,tuple[str,str,str]|None,int],None]
+
+
+class Instrument:
+    """
+    Counters, timers and hooks of reading and conversion
+
+    An instance is given to read(), findAcceptingRun() or toCfg(),
+    which do not record anything if no instance is given.
+    """
+
+    def __init__(self, hooks:list[Hook]|None = None) -> None:
+        self.configurations: int = 0# configurations explored
+        self.branching: Counter[int] = Counter()# number of alternatives -> number of configurations
+        self.maxHeight: int = 0# maximum height of the stack
+        self.epsilonSteps: int = 0# transitions without input
+        self.deadEnds: Counter[str] = Counter()# reason -> number of runs stopped without acceptance
+        self.phases: dict[str,float] = dict()# phase -> seconds
+        self._hooks: list[Hook] = list() if hooks is None else hooks
+
+    def addHook(self, hook:Hook) -> None:
+        self._hooks.append(hook)
+
+    def configuration(self, q:str, pos:int, height:int, f:tuple[str,str,str]|None, branches:int) -> None:
+        """
+        A configuration is expanded by the transition key f into branches alternatives
+        """
+        self.configurations += 1
+        self.branching[branches] += 1
+        if height > self.maxHeight:
+            self.maxHeight = height
+        if f is not None and f[1] == '' and branches > 0:
+            self.epsilonSteps += branches
+        for hook in self._hooks:
+            hook(q,pos,height,f,branches)
+
+    def deadEnd(self, reason:str) -> None:
+        """
+        A run stopped without acceptance
+
+        reason is 'undefined' (delta is not defined), 'vacant' (vacant stack), 'stop' (not an acceptance state)
+        or 'cycle' (transitions without input loop forever)
+        """
+        self.deadEnds[reason] += 1
+
+    @contextmanager
+    def phase(self, name:str) -> Iterator[None]:
+        """
+        Measure the time of a phase, accumulated over calls
+        """
+        t: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name,0.0)+time.perf_counter()-t
+
+    def branchingFactor(self) -> float:
+        """
+        Average number of alternatives over the configurations explored
+        """
+        if self.configurations == 0:
+            return 0.0
+        return sum(b*c for b,c in self.branching.items())/self.configurations
+
+    def report(self) -> dict[str,object]:
+        return {
+            'configurations':self.configurations,
+            'branching':dict(sorted(self.branching.items())),
+            'branchingFactor':self.branchingFactor(),
+            'maxHeight':self.maxHeight,
+            'epsilonSteps':self.epsilonSteps,
+            'deadEnds':dict(self.deadEnds),
+            'phases':dict(self.phases),
+        }
+
+    def __str__(self) -> str:
+        return '\n'.join(f'{k} = {v}' for k,v in self.report().items())
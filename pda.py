@@ -1,7 +1,27 @@
+import functools
+import io
+import os
 import re
+import multiprocessing
+from collections import deque
 from cfg import CFG
-from stack import Stack
-from typing import NamedTuple
+from stack import Stack, PStack
+from record import Step, Trace, RunNode, RunTree
+from compiled import CompiledPDA
+from instrument import Instrument
+from budget import Budget, BudgetGuard, BudgetExceeded
+from cache import ConversionCache, defaultCache
+from gss import GSSRecognizer
+from prefilter import PreFilter
+from cooperative import YIELD_EVERY, complete, drive
+from contextlib import nullcontext
+from concurrent.futures import Executor
+from typing import TYPE_CHECKING, NamedTuple, Iterable, Iterator, Generator, ContextManager, TextIO
+if TYPE_CHECKING:
+    from vectorized import VectorizedDPDA
+
+# Subscript of a symbol in LaTeX
+_SUBSCRIPT = re.compile(r'text{(\S+)_(\S+)}')
 
 
 class TR(NamedTuple):
@@ -62,8 +82,32 @@ class DPDA:
         self._states: set[str] = states
         self._alphabet: set[str] = alphabet
         self._stackAlphabet: set[str] = stackAlphabet
+        self._epsilonFolds: dict[tuple[str,str],tuple[str|None,str|None]] = dict()
+
+    @classmethod
+    def _restore(cls, q_0 : str, delta : dict, F : set[str], Z_0 : str, states : set[str], alphabet : set[str], stackAlphabet : set[str]):
+        """
+        Automaton of which states and alphabets are already known, delta is not scanned
+        """
+        pda = cls.__new__(cls)
+        pda._q_0 = q_0
+        pda._delta = delta
+        pda._F = F
+        pda._Z_0 = Z_0
+        pda._states = states
+        pda._alphabet = alphabet
+        pda._stackAlphabet = stackAlphabet
+        pda._epsilonFolds = dict()
+        return pda
+
+    def save(self, path : str) -> None:
+        """
+        Save this automaton in the binary format, see serialize.py
+        """
+        import serialize
+        serialize.save(self,path)
 
-    def read(self, input : str, latex = False) -> tuple[bool, str, list[str]]:
+    def read(self, input : str, latex = False, instrument : Instrument|None = None) -> tuple[bool, str, list[str]]:
         """
         Process an input
 
@@ -73,6 +117,8 @@ class DPDA:
 
         latex True if the output is in LaTeX format
 
+        instrument Instrument to record the run, nothing is recorded if None
+
         
         Returns
         ---
@@ -84,58 +130,226 @@ class DPDA:
 
         sequence Sequence of state transitions
         """
+        (result,message,trace) = self.readTrace(input,instrument)
+        return result,message,trace.render(latex)
+
+    def readTrace(self, input : str, instrument : Instrument|None = None) -> tuple[bool, str, Trace]:
+        """
+        Process an input and record the run as Trace
+
+        Returns
+        ---
+        (result,message,trace) where trace renders the sequence of state transitions on demand
+        """
         q: str = self._q_0
-        sequence:list[str] = list()#Sequence of state transitions
+        trace: Trace = Trace(input,self._Z_0)
         stack:Stack[str] = Stack()
         stack.push(self._Z_0)
-        return self._readSub(q,input,sequence,stack,latex)
+        n: int = len(input)
+        i: int = 0# Position of the next input symbol
+        while True:
+            pos: int = i
+            if i == n:# No more input
+                if stack.is_empty():# stack is empty
+                    trace.append(Step(q,pos,0,None,None))
+                    if instrument is not None:
+                        instrument.configuration(q,pos,0,None,0)
+                    if q not in self._F:
+                        if instrument is not None:
+                            instrument.deadEnd('stop')
+                        return False,f'stop at {q}',trace
+                    return True,'accepted',trace
+                g: str = stack.pop()
+                f: tuple[str,str,str] = (q,'',g)
+                (_,message) = self.epsilonFold(q,g)
+                if message is not None and message.startswith('epsilon cycle'):# The run never ends
+                    trace.append(Step(q,pos,stack.size()+1,None,None))
+                    if instrument is not None:
+                        instrument.configuration(q,pos,stack.size()+1,f,1)
+                        instrument.deadEnd('cycle')
+                    return False,message,trace
+            else:
+                if stack.is_empty():# stack is empty
+                    trace.append(Step(q,pos,0,None,None))
+                    if instrument is not None:
+                        instrument.configuration(q,pos,0,None,0)
+                        instrument.deadEnd('vacant')
+                    return False,'vacant stack',trace
+                g = stack.pop()
+                f = (q,input[i],g)
+                i += 1
+            if f not in self._delta:
+                trace.append(Step(q,pos,stack.size()+1,None,None))
+                if instrument is not None:
+                    instrument.configuration(q,pos,stack.size()+1,f,0)
+                    instrument.deadEnd('undefined')
+                return False,f'delta({f}) is not defined',trace
+            if instrument is not None:
+                instrument.configuration(q,pos,stack.size()+1,f,1)
+            (p,Z) = self._delta[f]
+            trace.append(Step(q,pos,stack.size()+1,f,Z))
+            q = p
+            DPDA._stackPush(Z,stack)
 
-    def _readSub(self, q : str, inputStr : str, sequence : list[str], stack : Stack[str], latex:bool) -> tuple[bool, str, list[str]]:
+    def accepts(self, input : str) -> tuple[bool, str]:
         """
-        Recursive method for input
+        Process an input without recording the sequence of state transitions
+
+        Parameters
+        ---
+        input Input string
+
+        Returns
+        ---
+        (result,message) as in read()
         """
-        if len(inputStr) == 0:# No more input
-            if stack.is_empty():# stack is empty
-                ss = DPDA._mkStr(q,sequence,inputStr,stack,latex)
-                sequence.append(ss)
-                message = 'accepted'
-                result = True
-                if q not in self._F:
-                    message = f'stop at {q}'
-                    result = False
-                return result,message,sequence
-            else:# stack is not empty
-                ss: str = DPDA._mkStr(q,sequence,inputStr,stack,latex)
-                sequence.append(ss)
-                g: str = stack.pop()
-                f:tuple[str,str,str] = (q,'',g)
-                if f not in self._delta:
-                    message = f'delta({f}) is not defined'
-                    result = False
-                    return result,message,sequence
-                (q,Z) = self._delta[f]
-                DPDA._stackPush(Z,stack)
-                return self._readSub(q,inputStr,sequence,stack,latex)
-        
-        if stack.is_empty():# stack is empty
-            ss = DPDA._mkStr(q,sequence,inputStr,stack,latex)
-            sequence.append(ss)
-            message = 'vacant stack'
-            result = False
-            return result,message,sequence
-        
-        s: str = inputStr[0]
-        ss = DPDA._mkStr(q,sequence,inputStr,stack,latex)
-        sequence.append(ss)
-        g = stack.pop()
-        f = (q,s,g)
-        if f not in self._delta:
-            message = f'delta({f}) is not defined'
-            result = False
-            return result,message,sequence
-        (q,Z) = self._delta[f]
-        DPDA._stackPush(Z,stack)
-        return self._readSub(q,inputStr[1:],sequence,stack,latex)
+        reader: DPDAReader = self.reader()
+        reader.feed(input)
+        return reader.finish()
+
+    async def acceptsAsync(self, input : str, yieldEvery : int = YIELD_EVERY, executor : Executor|None = None) -> tuple[bool, str]:
+        """
+        accepts() without blocking the event loop, stopped if the awaiting task is cancelled
+
+        Parameters
+        ---
+        input Input string
+
+        yieldEvery Number of input symbols read between two yields to the event loop
+
+        executor Thread pool reading the input, the input is read in the event loop if None
+        """
+        return await drive(self._feedSteps(input,yieldEvery),executor)
+
+    def _feedSteps(self, input:str, pause:int) -> Generator[None,None,tuple[bool,str]]:
+        reader: DPDAReader = self.reader()
+        size: int = pause if pause > 0 else max(len(input),1)
+        for i in range(0,len(input),size):
+            if not reader.feed(input[i:i+size]):
+                break
+            yield
+        return reader.finish()
+
+    def epsilonFold(self, q : str, g : str) -> tuple[str|None, str|None]:
+        """
+        Fold the chain of transitions without input from state q with g on the top until g is popped
+
+        The result is computed once for each (q,g) and the chains folded on the way are also kept.
+
+        Returns
+        ---
+        (p,None) if g is popped at state p, (None,message) if the chain stops or loops forever
+        """
+        folds = self._epsilonFolds
+        if (q,g) in folds:
+            return folds[(q,g)]
+        # Chains being folded: [(q,g), current state, pushed symbols, number of symbols already popped]
+        work: list[list] = list()
+        onPath: set[tuple[str,str]] = set()
+        key: tuple[str,str] = (q,g)
+        while True:
+            f: tuple[str,str,str] = (key[0],'',key[1])
+            if key in folds:
+                (p,message) = folds[key]
+            elif key in onPath:
+                (p,message) = (None,f'epsilon cycle at {f}')
+            elif f not in self._delta:
+                (p,message) = (None,f'delta({f}) is not defined')
+                folds[key] = (p,message)
+            else:
+                (r,Z) = self._delta[f]
+                if len(Z) > 0:# Start to fold the chain of key
+                    onPath.add(key)
+                    work.append([key,r,Z,0])
+                    key = (r,Z[0])
+                    continue
+                (p,message) = (r,None)# key is popped at once
+                folds[key] = (p,message)
+            if p is None:# The chains on the path stop in the same way, a chain on the cycle loops at its own key
+                inCycle: bool = False
+                for frame in work:
+                    inCycle = inCycle or frame[0] == key
+                    folds[frame[0]] = (None,f"epsilon cycle at {(frame[0][0],'',frame[0][1])}" if inCycle else message)
+                return folds[(q,g)] if (q,g) in folds else (None,message)
+            # key is popped at p, then the next pushed symbol of the chain is popped
+            while len(work) > 0:
+                frame = work[-1]
+                frame[1] = p
+                frame[3] += 1
+                if frame[3] < len(frame[2]):
+                    break
+                work.pop()
+                onPath.discard(frame[0])
+                folds[frame[0]] = (p,None)
+            if len(work) == 0:
+                return folds[(q,g)]
+            key = (work[-1][1],work[-1][2][work[-1][3]])
+
+    def reader(self) -> 'DPDAReader':
+        """
+        Start an incremental reading session, see DPDAReader
+        """
+        return DPDAReader(self)
+
+    def compile(self) -> CompiledPDA:
+        """
+        Intern the symbols into integers and build flat transition tables
+
+        The result processes inputs as accepts() and can be reused for any number of inputs.
+        """
+        return CompiledPDA.fromPda(self,True)
+
+    def vectorize(self) -> 'VectorizedDPDA':
+        """
+        Dense transition tables as NumPy arrays, which process many inputs at once in lockstep
+
+        The results of VectorizedDPDA.accepts() are the same as accepts(), the transitions without input
+        at the end of an input are folded as epsilonFold(), so that an epsilon cycle ends the input. NumPy is required.
+        """
+        from vectorized import VectorizedDPDA
+        return VectorizedDPDA.fromPda(self)
+
+    def readMany(self, inputs : Iterable[str], workers : int|None = None, chunksize = 64, ordered = True, trace = False, latex = False) -> Iterator:
+        """
+        Process many inputs in worker processes
+
+        The automaton is sent to each worker once, and the inputs are sent in chunks.
+
+        Parameters
+        ---
+        inputs Input strings, consumed lazily
+
+        workers Number of worker processes, os.cpu_count() if None, no process is started if 1 or less
+
+        chunksize Number of inputs sent to a worker at once
+
+        ordered True if the results are given in the order of the inputs
+
+        trace True for the results of read(), False for the results of accepts()
+
+        latex True if the sequences are in LaTeX format, used with trace
+
+        Returns
+        ---
+        Iterator of the results if ordered, otherwise of (index of the input,result)
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        items = enumerate(inputs)
+        if workers <= 1:# The automaton is bound to this call, not to the globals of the workers
+            results = map(functools.partial(_readOne,self,None if trace else self.compile(),trace,latex),items)
+            if ordered:
+                return (r for (_,r) in results)
+            return results
+        return self._readManyPool(items,workers,chunksize,ordered,trace,latex)
+
+    def _readManyPool(self, items : Iterator[tuple[int,str]], workers : int, chunksize : int, ordered : bool, trace : bool, latex : bool) -> Iterator:
+        with multiprocessing.Pool(workers,_initWorker,(self,trace,latex)) as pool:
+            if ordered:
+                for (_,r) in pool.imap(_readOneInWorker,items,chunksize):
+                    yield r
+            else:
+                yield from pool.imap_unordered(_readOneInWorker,items,chunksize)
 
     def __str__(self) -> str:
         text: str = f'Q = {self._states}\n'
@@ -148,79 +362,51 @@ class DPDA:
         return text
         
     def latexExp(self) -> str:
-        text = DPDA._latexElement('Q',self._states)
-        text += DPDA._latexElement('F',self._F)
-        text += DPDA._latexElement('\\Sigma',self._alphabet,True)
-        text += DPDA._latexElement('\\Gamma',self._stackAlphabet)
+        fp = io.StringIO()
+        self.writeLatex(fp)
+        return fp.getvalue()
+
+    def writeLatex(self, fp : TextIO) -> None:
+        """
+        Write the definition of this automaton in LaTeX to fp, a row for each transition
+        """
+        self._writeElements(fp)
         for e in self._delta.keys():
             (q,a,s) = e
-            text += f'\\delta\\left({q},{DPDA._toText(a)},'
-            if len(s) == 0:
-                text += '\\epsilon'
-            else:
-                for ss in s:
-                    text += f'{ss}'
-#                    text += f'{DPDA._toText(ss)}'
-            text += '\\right)&=\\left('
-            (p, s) = self._delta[e]
-            text += f'{q},'
-            if len(s) == 0:
-                text += '\\epsilon'
-            else:
-                for ss in s:
-                    text += f'{ss}'
-#                    text += f'{DPDA._toText(ss)}'
-            text += '\\right)\\\\\n'
-        return text
+            (p, Z) = self._delta[e]
+            fp.write(f'\\delta\\left({q},{DPDA._toText(a)},{DPDA._latexStack(s)}\\right)&=\\left({q},{DPDA._latexStack("".join(Z))}\\right)\\\\\n')
 
+    def writeTrace(self, fp : TextIO, trace : Trace, latex = False) -> None:
+        """
+        Write the configurations of trace to fp, a line for each configuration
+        """
+        trace.write(fp,latex)
 
-    @staticmethod
-    def _latexElement(name:str,input:set[str],b=False)->str:
-        text = f'{name}&=\\set{{'
-        for s in input:
-            if b:
-                text += DPDA._toText(s)+','
-            else:
-                text += f'{s},'                
-        text = text.removesuffix(',')
-        text += '}\\\\\n'
-        return text
+    def _writeElements(self, fp : TextIO) -> None:
+        fp.write(DPDA._latexElement('Q',self._states))
+        fp.write(DPDA._latexElement('F',self._F))
+        fp.write(DPDA._latexElement('\\Sigma',self._alphabet,True))
+        fp.write(DPDA._latexElement('\\Gamma',self._stackAlphabet))
 
     @staticmethod
-    def _toText(s:str)->str:
-        s = f'text{{{s}}}'
-        return '\\'+re.sub(r'text{(\S+)_(\S+)}',r'text{\1}_{\2}',s)
+    def _latexStack(s:str) -> str:
+        if len(s) == 0:
+            return '\\epsilon'
+        return s
 
     @staticmethod
-    def _mkStr(q:str,sequence:list[str],inputStr:str,stack:Stack[str],latex:bool) -> str:
-        ss:str = ''
-        if len(sequence) > 0:
-            if latex:
-                ss = '\\vdash'
-            else:
-                ss = '|-'
-        if latex:
-            if len(inputStr) > 0:
-                ss += f'\\left({q},\\text{{{inputStr}}},{DPDA._mkStackStr(stack,latex)}\\right)'
-            else:
-                ss += f'\\left({q},\\epsilon,{DPDA._mkStackStr(stack,latex)}\\right)'
+    def _latexElement(name:str,input:set[str],b=False)->str:
+        if b:
+            elements = ','.join(DPDA._toText(s) for s in input)
         else:
-            ss += f'({q},{inputStr},{DPDA._mkStackStr(stack,latex)})'
-        return ss
+            elements = ','.join(f'{s}' for s in input)
+        return f'{name}&=\\set{{{elements}}}\\\\\n'
 
     @staticmethod
-    def _mkStackStr(stack:Stack[str],latex:bool) -> str:
-        reversedStack:Stack[str] = stack.reversed()
-        if latex:
-            if not reversedStack.is_empty():
-                # ss:str = "".join(reversedStack)
-                s:str = f'{reversedStack}'
-#                s = f'\\text{{{ss}}}'
-            else:
-                s = '\\epsilon'
-        else:
-            s = str(reversedStack)
-        return s
+    @functools.lru_cache(maxsize=4096)
+    def _toText(s:str)->str:
+        s = f'text{{{s}}}'
+        return '\\'+_SUBSCRIPT.sub(r'text{\1}_{\2}',s)
 
     @staticmethod
     def _stackPush(Z:list[str],stack:Stack[str]) -> None:
@@ -256,11 +442,82 @@ class DPDA:
     def Z(self) -> str:
         return self._Z_0
 
+class DPDAReader:
+    """
+    Incremental reading session of a DPDA
+
+    The input is given to feed() in chunks of any size and the result is obtained by finish().
+    Neither the whole input nor the sequence of state transitions is kept.
+    """
+
+    def __init__(self, dpda: DPDA) -> None:
+        self._dpda: DPDA = dpda
+        self._delta: dict[tuple[str, str, str], tuple[str, list[str]]] = dpda.delta
+        self._F: set[str] = dpda.F
+        self._q: str = dpda.q_0
+        self._stack: Stack[str] = Stack()
+        self._stack.push(dpda.Z)
+        self._message: str|None = None# Message if the run has already stopped
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Read a chunk of the input
+
+        Returns
+        ---
+        False if the run has already stopped with rejection
+        """
+        if self._message is not None:
+            return False
+        q: str = self._q
+        stack: Stack[str] = self._stack
+        delta = self._delta
+        for s in chunk:
+            if stack.is_empty():# stack is empty
+                self._message = 'vacant stack'
+                break
+            f: tuple[str,str,str] = (q,s,stack.pop())
+            if f not in delta:
+                self._message = f'delta({f}) is not defined'
+                break
+            (q,Z) = delta[f]
+            DPDA._stackPush(Z,stack)
+        self._q = q
+        return self._message is None
+
+    def finish(self) -> tuple[bool, str]:
+        """
+        Notify the end of the input
+
+        Returns
+        ---
+        (result,message) as in DPDA.read()
+        """
+        if self._message is not None:
+            return False,self._message
+        q: str = self._q
+        stack: Stack[str] = self._stack
+        while not stack.is_empty():# Transitions without input, folded for each symbol of the stack
+            (p,message) = self._dpda.epsilonFold(q,stack.pop())
+            if p is None:
+                self._message = message
+                return False,message# type: ignore[return-value]
+            q = p
+        self._q = q
+        if q not in self._F:
+            self._message = f'stop at {q}'
+            return False,self._message
+        return True,'accepted'
+
+
 ################################################################
 class NPDA(DPDA):
     """
     Non-deterministic Pushdown Automaton
     """
+    # Budget of a run of an automaton having epsilon cycles if no budget is given
+    DEFAULT_BUDGET: Budget = Budget(maxSteps=100000,maxBranches=1000)
+
     def __init__(self, q_0 : str, delta : dict[tuple[str,str,str],list[tuple[str,list[str]]]], F : set[str], Z_0 :str) -> None:
         """
         Constructor
@@ -298,206 +555,860 @@ class NPDA(DPDA):
         self._states: set[str] = states
         self._alphabet: set[str] = alphabet
         self._stackAlphabet: set[str] = stackAlphabet
+        self._epsilonCycles: set[tuple[str,str]]|None = None
+        self._epsilonSummaries: dict[tuple[str,str],set[str]]|None = None
+        self._popSummaries: tuple[dict[tuple[str,str],set[str]],dict[tuple[str,str],set[str]]]|None = None
+        self._preFilter: PreFilter|None = None
 
-    def read(self, input : str, latex = False) -> list[tuple[bool, str, list[str]]]:
-        q: str = self._q_0
-        sequence: list[str] = list()#Sequence of state transitions
-        sequenceList: list[tuple[bool,str,list[str]]] = list()
-        stack: Stack[str] = Stack()
-        stack.push(self._Z_0)
-        self._readSub(q,input,sequence,stack,sequenceList, latex)
-        return sequenceList
+    @classmethod
+    def _restore(cls, q_0 : str, delta : dict, F : set[str], Z_0 : str, states : set[str], alphabet : set[str], stackAlphabet : set[str]):
+        npda = super()._restore(q_0,delta,F,Z_0,states,alphabet,stackAlphabet)
+        npda._epsilonCycles = None
+        npda._epsilonSummaries = None
+        npda._popSummaries = None
+        npda._preFilter = None
+        return npda
+
+    def read(self, input : str, latex = False, instrument : Instrument|None = None, budget : Budget|None = None) -> list[tuple[bool, str, list[str]]]:
+        return [(result,message,trace.render(latex)) for (result,message,trace) in self.readTrace(input,instrument,budget)]
+
+    def readTrace(self, input : str, instrument : Instrument|None = None, budget : Budget|None = None) -> list[tuple[bool, str, Trace]]:
+        """
+        Process an input and record every run as Trace, see readTree()
+        """
+        return list(self.iterRuns(input,instrument=instrument,budget=budget))
+
+    async def readAsync(self, input : str, latex = False, instrument : Instrument|None = None, budget : Budget|None = None,
+                        yieldEvery : int = YIELD_EVERY, executor : Executor|None = None) -> list[tuple[bool, str, list[str]]]:
+        """
+        read() without blocking the event loop, stopped if the awaiting task is cancelled
+
+        Parameters
+        ---
+        yieldEvery Number of configurations explored between two yields to the event loop
+
+        executor Thread pool exploring the runs, the runs are explored in the event loop if None
+        """
+        traces: list[tuple[bool, str, Trace]] = await drive(self._traceSteps(input,instrument,budget,yieldEvery),executor)
+        return [(result,message,trace.render(latex)) for (result,message,trace) in traces]
+
+    def _traceSteps(self, input:str, instrument:Instrument|None, budget:Budget|None, pause:int) -> Generator[None,None,list[tuple[bool,str,Trace]]]:
+        traces: list[tuple[bool, str, Trace]] = list()
+        for run in self._runSteps(input,instrument,budget,pause):
+            if run is None:
+                yield
+                continue
+            (result,message,leaf) = run
+            traces.append((result,message,Trace(input,self._Z_0,leaf.path())))
+        return traces
+
+    def iterRuns(self, input : str, acceptingOnly = False, limit : int|None = None,
+                 instrument : Instrument|None = None, budget : Budget|None = None) -> Iterator[tuple[bool, str, Trace]]:
+        """
+        Yield (result,message,trace) of each run as soon as it ends, in the order of read()
+
+        Parameters
+        ---
+        input Input string
+
+        acceptingOnly True if only the accepted runs are yielded
+
+        limit Maximum number of runs yielded, no limit if None
+
+        The runs not yet yielded are not explored until the next one is requested,
+        and the steps of a run are kept only while the run is yielded or to be explored.
+        """
+        if limit is not None and limit <= 0:
+            return
+        count: int = 0
+        for (result,message,leaf) in self._runs(input,instrument,budget):
+            if acceptingOnly and not result:
+                continue
+            yield result,message,Trace(input,self._Z_0,leaf.path())
+            count += 1
+            if count == limit:
+                return
 
-    #再帰的の文字を読む
-    def _readSub(self, q:str, inputStr:str, sequence:list[str],stack:Stack[str], sequenceList:list[tuple[bool,str,list[str]]], latex:bool) -> None:
-        if len(inputStr) == 0:#No more  input
+    def readTree(self, input : str, instrument : Instrument|None = None, budget : Budget|None = None) -> RunTree:
+        """
+        Process an input and record every run in RunTree, where runs share their common steps
+
+        A run exceeding a limit of budget ends with the message 'budget exceeded: reason'.
+        A run exceeding maxHeight is stopped alone, and the whole reading is stopped by the other limits.
+        If budget is None, DEFAULT_BUDGET is used for an automaton having epsilon cycles.
+        """
+        tree: RunTree = RunTree(input,self._Z_0)
+        for (result,message,node) in self._runs(input,instrument,budget):
+            tree.add(result,message,node)
+        return tree
+
+    def _runs(self, input:str, instrument:Instrument|None, budget:Budget|None) -> Iterator[tuple[bool,str,RunNode]]:
+        """
+        Explore the runs depth-first and yield (result,message,last step) of each run when it ends
+        """
+        for run in self._runSteps(input,instrument,budget,0):
+            if run is not None:
+                yield run
+
+    def _runSteps(self, input:str, instrument:Instrument|None, budget:Budget|None, pause:int) -> Iterator[tuple[bool,str,RunNode]|None]:
+        """
+        _runs() also yielding None every pause configurations, never if pause is 0
+        """
+        if budget is None and len(self.epsilonCycles()) > 0:
+            budget = NPDA.DEFAULT_BUDGET
+        guard: BudgetGuard|None = None if budget is None else budget.guard()
+        # Configurations to be explored with the step leading to them, depth-first
+        work: list[tuple[str,int,RunNode|None,PStack[str]]] = [(self._q_0,0,None,PStack([self._Z_0]))]
+        count: int = 0
+        while work:
+            if pause > 0:
+                count += 1
+                if count == pause:
+                    count = 0
+                    yield None
+            (q,pos,node,stack) = work.pop()
+            if guard is not None:
+                reason: str|None = guard.check(stack.size(),len(work))
+                if reason is not None:
+                    yield False,f'budget exceeded: {reason}',RunNode(Step(q,pos,stack.size(),None,None),node)
+                    if reason == 'height':
+                        continue
+                    return
+            leaf = self._readSub(q,input,pos,node,stack,work,instrument)
+            if leaf is not None:
+                yield leaf
+
+    #一つの状況から文字を読む
+    def _readSub(self, q:str, input:str, pos:int, node:RunNode|None, stack:PStack[str],
+                 work:list[tuple[str,int,RunNode|None,PStack[str]]], instrument:Instrument|None) -> tuple[bool,str,RunNode]|None:
+        if pos == len(input):#No more  input
             if stack.is_empty():#stack is empty
-                ss = DPDA._mkStr(q,sequence,inputStr,stack,latex)
-                sequence.append(ss)
+                leaf: RunNode = RunNode(Step(q,pos,0,None,None),node)
                 message = 'accepted'
                 result = True
                 if len(self._F) > 0:# Acceptance states are defined
                     if q not in self._F:
                         message = f'stop at {q}'
                         result = False
-                sequenceList.append((result,message,sequence))
-                return
+                if instrument is not None:
+                    instrument.configuration(q,pos,0,None,0)
+                    if not result:
+                        instrument.deadEnd('stop')
+                return result,message,leaf
             else:# stack is not empty
-                ss = DPDA._mkStr(q,sequence,inputStr,stack,latex)
-                sequence.append(ss)
-                g = stack.pop()
+                height = stack.size()
+                (g,rest) = stack.pop()
                 f = (q,'',g)
                 if f not in self._delta:
+                    leaf = RunNode(Step(q,pos,height,None,None),node)
+                    if instrument is not None:
+                        instrument.configuration(q,pos,height,f,0)
+                        instrument.deadEnd('undefined')
                     message = f'delta({f}) is not defined'
                     result = False
-                    sequenceList.append((result,message,sequence))
-                    return
-                for o in self._delta[f]:
-                    (q,Z) = o
-                    newSequence = list(sequence)
-                    newStack = Stack(stack)
-                    DPDA._stackPush(Z,newStack)
-                    self._readSub(q,inputStr,newSequence,newStack,sequenceList,latex)
-                return
+                    return result,message,leaf
+                if instrument is not None:
+                    instrument.configuration(q,pos,height,f,len(self._delta[f]))
+                # The first alternative is explored first
+                for o in reversed(self._delta[f]):
+                    (p,Z) = o
+                    work.append((p,pos,RunNode(Step(q,pos,height,f,Z),node),rest.pushList(Z)))
+                return None
         
         if stack.is_empty():# stack is empty
-            ss = DPDA._mkStr(q,sequence,inputStr,stack,latex)
-            sequence.append(ss)
+            leaf = RunNode(Step(q,pos,0,None,None),node)
+            if instrument is not None:
+                instrument.configuration(q,pos,0,None,0)
+                instrument.deadEnd('vacant')
             message = 'vacant stack'
             result = False
-            sequenceList.append((result,message,sequence))
-            return
+            return result,message,leaf
         
-        s: str = inputStr[0]
-        ss: str = DPDA._mkStr(q,sequence,inputStr,stack,latex)
-        sequence.append(ss)
-        g: str = stack.pop()
+        s: str = input[pos]
+        height: int = stack.size()
+        (g,rest) = stack.pop()
         f: tuple[str, str, str] = (q,s,g)
         if f not in self._delta:
+            leaf = RunNode(Step(q,pos,height,None,None),node)
+            if instrument is not None:
+                instrument.configuration(q,pos,height,f,0)
+                instrument.deadEnd('undefined')
             message: str = f'delta({f}) is not defined'
             result = False
-            sequenceList.append((result,message,sequence))
-            return
-        for o in self._delta[f]:
-            (q,Z) = o
-            newSequence = list(sequence)
-            newStack = Stack(stack)
-            DPDA._stackPush(Z,newStack)
-            self._readSub(q,inputStr[1:],newSequence,newStack,sequenceList,latex)
+            return result,message,leaf
+        if instrument is not None:
+            instrument.configuration(q,pos,height,f,len(self._delta[f]))
+        for o in reversed(self._delta[f]):
+            (p,Z) = o
+            work.append((p,pos+1,RunNode(Step(q,pos,height,f,Z),node),rest.pushList(Z)))
+        return None
 
-    def latexExp(self) -> str:
-        text: str = DPDA._latexElement('Q',self._states)
-        text += DPDA._latexElement('F',self._F)
-        text += DPDA._latexElement('\\Sigma',self._alphabet,True)
-        text += DPDA._latexElement('\\Gamma',self._stackAlphabet)
+    def epsilonCycles(self) -> set[tuple[str,str]]:
+        """
+        Pairs (state, stack top) lying on a cycle of transitions without input
+
+        A transition (q,'',g) -> (p,Z1...Zk) leads to (p,Z1), and to (r,Zi) for every state r
+        at which Z1,...,Z(i-1) are popped in turn from p, see epsilonSummaries(). A pop leads nowhere,
+        since the run continues with the symbol below, which belongs to an earlier pair.
+        A run may loop forever at the end of the input only through these pairs.
+        The result is computed once from delta.
+        """
+        if self._epsilonCycles is not None:
+            return self._epsilonCycles
+        summaries: dict[tuple[str,str],set[str]] = self.epsilonSummaries()
+        edges: dict[tuple[str,str],set[tuple[str,str]]] = dict()
+        for (q,a,g) in self._delta:
+            if a != '':
+                continue
+            for (p,Z) in self._delta[(q,a,g)]:
+                states: set[str] = {p}
+                for z in Z:
+                    edges.setdefault((q,g),set()).update((r,z) for r in states)
+                    states = {s for r in states for s in summaries.get((r,z),())}
+                    if len(states) == 0:
+                        break
+        # Strongly connected components by Tarjan's algorithm without recursion
+        index: dict[tuple[str,str],int] = dict()
+        low: dict[tuple[str,str],int] = dict()
+        path: list[tuple[str,str]] = list()
+        onPath: set[tuple[str,str]] = set()
+        cycles: set[tuple[str,str]] = set()
+        for root in edges:
+            if root in index:
+                continue
+            index[root] = low[root] = len(index)
+            path.append(root)
+            onPath.add(root)
+            work: list[tuple[tuple[str,str],Iterator[tuple[str,str]]]] = [(root,iter(edges[root]))]
+            while work:
+                (v,children) = work[-1]
+                w: tuple[str,str]|None = next(children,None)
+                if w is None:
+                    work.pop()
+                    if len(work) > 0:
+                        u = work[-1][0]
+                        low[u] = min(low[u],low[v])
+                    if low[v] == index[v]:# v is the root of a component
+                        component: list[tuple[str,str]] = list()
+                        while True:
+                            x = path.pop()
+                            onPath.discard(x)
+                            component.append(x)
+                            if x == v:
+                                break
+                        if len(component) > 1 or v in edges.get(v,set()):
+                            cycles.update(component)
+                elif w not in index:
+                    index[w] = low[w] = len(index)
+                    path.append(w)
+                    onPath.add(w)
+                    work.append((w,iter(edges.get(w,set()))))
+                elif w in onPath:
+                    low[v] = min(low[v],index[w])
+        self._epsilonCycles = cycles
+        return cycles
+
+    def epsilonSummaries(self) -> dict[tuple[str,str],set[str]]:
+        """
+        States at which g is popped by transitions without input from state q with g on the top
+
+        The result maps (q,g) to the set of such states, which is the least solution of
+        p in Sum(q,g) if (q,'',g) -> (r,Z1...Zk) and p is reached from r by popping Z1,...,Zk in turn.
+        It is computed once from delta.
+        """
+        if self._epsilonSummaries is not None:
+            return self._epsilonSummaries
+        summaries: dict[tuple[str,str],set[str]] = dict()
+        epsilon: list[tuple[str,str]] = [(q,g) for (q,a,g) in self._delta if a == '']
+        changed: bool = True
+        while changed:
+            changed = False
+            for (q,g) in epsilon:
+                result: set[str] = summaries.setdefault((q,g),set())
+                for (r,Z) in self._delta[(q,'',g)]:
+                    states: set[str] = {r}
+                    for z in Z:
+                        states = {s for p in states for s in summaries.get((p,z),())}
+                        if len(states) == 0:
+                            break
+                    if not states <= result:
+                        result |= states
+                        changed = True
+        self._epsilonSummaries = summaries
+        return summaries
+
+    def popSummaries(self) -> tuple[dict[tuple[str,str],set[str]],dict[tuple[str,str],set[str]]]:
+        """
+        States at which g is popped from state q with g on the top by reading some input
+
+        Returns
+        ---
+        (inputOnly,mixed) where inputOnly[(q,g)] are the states reached by transitions with input only,
+        and mixed[(q,g)] are the states reached by transitions with input followed by transitions without input
+        after the end of the input, including epsilonSummaries()
+        """
+        if self._popSummaries is not None:
+            return self._popSummaries
+        epsilon: dict[tuple[str,str],set[str]] = self.epsilonSummaries()
+        inputOnly: dict[tuple[str,str],set[str]] = dict()
+        mixed: dict[tuple[str,str],set[str]] = {k:set(v) for k,v in epsilon.items()}
+        keys: list[tuple[str,str,str]] = [f for f in self._delta if f[1] != '']
+        changed: bool = True
+        while changed:
+            changed = False
+            for (q,a,g) in keys:
+                resultInput: set[str] = inputOnly.setdefault((q,g),set())
+                resultMixed: set[str] = mixed.setdefault((q,g),set())
+                for (r,Z) in self._delta[(q,a,g)]:
+                    # States still reading the input and states after the end of the input
+                    reading: set[str] = {r}
+                    ended: set[str] = set()
+                    for z in Z:
+                        ended = {s for p in reading for s in mixed.get((p,z),())} | {s for p in ended for s in epsilon.get((p,z),())}
+                        reading = {s for p in reading for s in inputOnly.get((p,z),())}
+                        if len(reading) == 0 and len(ended) == 0:
+                            break
+                    if not reading <= resultInput:
+                        resultInput |= reading
+                        changed = True
+                    if not (reading | ended) <= resultMixed:
+                        resultMixed |= reading | ended
+                        changed = True
+        self._popSummaries = (inputOnly,mixed)
+        return self._popSummaries
+
+    def recognizer(self) -> GSSRecognizer:
+        """
+        Start an incremental recognition over a streamed input, see GSSRecognizer
+        """
+        return GSSRecognizer(self)
+
+    def reader(self) -> 'DPDAReader':
+        """
+        DPDAReader reads only DPDA, see recognizer()
+        """
+        raise TypeError('NPDA has no DPDAReader, use recognizer()')
+
+    def epsilonFold(self, q : str, g : str) -> tuple[str|None, str|None]:
+        """
+        The transitions without input of NPDA do not form a chain, see epsilonSummaries()
+        """
+        raise TypeError('NPDA has no epsilon fold, use epsilonSummaries()')
+
+    def preFilter(self) -> PreFilter:
+        """
+        Finite automaton rejecting in linear time inputs never accepted, built once from delta, see PreFilter
+        """
+        if self._preFilter is None:
+            self._preFilter = PreFilter(self)
+        return self._preFilter
+
+    def acceptsMany(self, inputs : list[str], instrument : Instrument|None = None, budget : Budget|None = None) -> list[tuple[bool, str]]:
+        """
+        accepts() of each input, where the inputs rejected by preFilter() are not passed on to accepts()
+        """
+        preFilter: PreFilter = self.preFilter()
+        (passed,_) = preFilter.partition(inputs)
+        results: list[tuple[bool, str]] = [(False,'no accepting run')]*len(inputs)
+        for i in passed:
+            results[i] = self.accepts(inputs[i],instrument,budget)
+        return results
+
+    def accepts(self, input : str, instrument : Instrument|None = None, budget : Budget|None = None) -> tuple[bool, str]:
+        """
+        Decide whether an input is accepted
+
+        The configurations are searched breadth-first while the input remains as findAcceptingRun(),
+        and the transitions without input at the end of the input are decided by epsilonSummaries().
+
+        Returns
+        ---
+        (result,message) where message is 'budget exceeded: reason' if a limit of budget is exceeded
+        """
+        return complete(self._acceptSteps(input,instrument,budget,0))
+
+    async def acceptsAsync(self, input : str, instrument : Instrument|None = None, budget : Budget|None = None,
+                           yieldEvery : int = YIELD_EVERY, executor : Executor|None = None) -> tuple[bool, str]:
+        """
+        accepts() without blocking the event loop, stopped if the awaiting task is cancelled
+
+        Parameters
+        ---
+        yieldEvery Number of configurations explored between two yields to the event loop
+
+        executor Thread pool searching the configurations, they are searched in the event loop if None
+        """
+        return await drive(self._acceptSteps(input,instrument,budget,yieldEvery),executor)
+
+    def _acceptSteps(self, input:str, instrument:Instrument|None, budget:Budget|None, pause:int) -> Generator[None,None,tuple[bool,str]]:
+        try:
+            accepted: bool = yield from self._acceptsBySummaries(input,instrument,budget,pause)
+        except BudgetExceeded as e:
+            return False,str(e)
+        if not accepted:
+            return False,'no accepting run'
+        return True,'accepted'
+
+    def _acceptsBySummaries(self, input:str, instrument:Instrument|None, budget:Budget|None, pause:int) -> Generator[None,None,bool]:
+        """
+        Search yielding every pause configurations, never if pause is 0
+        """
+        summaries: dict[tuple[str,str],set[str]] = self.epsilonSummaries()
+        n: int = len(input)
+        start: tuple[str,int,PStack[str]] = (self._q_0,0,PStack([self._Z_0]))
+        seen: set[tuple[str,int,PStack[str]]] = {start}
+        queue: deque[tuple[str,int,PStack[str]]] = deque([start])
+        guard: BudgetGuard|None = None if budget is None else budget.guard()
+        pruned: bool = False# some configurations are higher than maxHeight
+        count: int = 0
+        while queue:
+            if pause > 0:
+                count += 1
+                if count == pause:
+                    count = 0
+                    yield
+            (q,pos,stack) = queue.popleft()
+            if guard is not None:
+                reason: str|None = guard.check(stack.size(),len(queue))
+                if reason == 'height':
+                    pruned = True
+                    continue
+                if reason is not None:
+                    raise BudgetExceeded(reason)
+            if pos == n:# No more input, the stack is popped by the summaries
+                states: set[str] = {q}
+                for g in stack:
+                    states = {s for p in states for s in summaries.get((p,g),())}
+                    if len(states) == 0:
+                        break
+                if instrument is not None:
+                    instrument.configuration(q,pos,stack.size(),None,len(states))
+                if len(states) > 0 and (len(self._F) == 0 or not states.isdisjoint(self._F)):
+                    return True
+                if instrument is not None:
+                    instrument.deadEnd('stop')
+                continue
+            if stack.is_empty():# stack is empty
+                if instrument is not None:
+                    instrument.configuration(q,pos,0,None,0)
+                    instrument.deadEnd('vacant')
+                continue
+            (g,rest) = stack.pop()
+            f: tuple[str,str,str] = (q,input[pos],g)
+            if f not in self._delta:
+                if instrument is not None:
+                    instrument.configuration(q,pos,stack.size(),f,0)
+                    instrument.deadEnd('undefined')
+                continue
+            if instrument is not None:
+                instrument.configuration(q,pos,stack.size(),f,len(self._delta[f]))
+            for (p,Z) in self._delta[f]:
+                c = (p,pos+1,rest.pushList(Z))
+                if c not in seen:
+                    seen.add(c)
+                    queue.append(c)
+        if pruned:
+            raise BudgetExceeded('height')
+        return False
+
+    def findAcceptingRun(self, input : str, instrument : Instrument|None = None, budget : Budget|None = None) -> tuple[Trace|None, int]:
+        """
+        Search an accepting run breadth-first
+
+        Configurations (state, input offset, stack) already seen are not explored again,
+        and the search stops at the first accepting configuration.
+        The search is recorded to instrument if given.
+        BudgetExceeded is raised if a limit of budget is exceeded before an accepting run is found;
+        configurations higher than maxHeight are not explored further.
+        If budget is None, DEFAULT_BUDGET is used for an automaton having epsilon cycles.
+
+        Returns
+        ---
+        (trace,count)
+
+        trace Accepting run, None if the input is not accepted
+
+        count Number of configurations explored
+        """
+        n: int = len(input)
+        start: tuple[str,int,PStack[str]] = (self._q_0,0,PStack([self._Z_0]))
+        configs: list[tuple[str,int,PStack[str]]] = [start]
+        parents: list[tuple[int,tuple[str,str,str],list[str]]|None] = [None]
+        seen: set[tuple[str,int,PStack[str]]] = {start}
+        queue: deque[int] = deque([0])
+        count: int = 0
+        if budget is None and len(self.epsilonCycles()) > 0:
+            budget = NPDA.DEFAULT_BUDGET
+        guard: BudgetGuard|None = None if budget is None else budget.guard()
+        pruned: bool = False# some configurations are higher than maxHeight
+        while queue:
+            k: int = queue.popleft()
+            count += 1
+            (q,pos,stack) = configs[k]
+            if guard is not None:
+                reason: str|None = guard.check(stack.size(),len(queue))
+                if reason == 'height':
+                    pruned = True
+                    continue
+                if reason is not None:
+                    raise BudgetExceeded(reason)
+            if stack.is_empty():# stack is empty
+                if instrument is not None:
+                    instrument.configuration(q,pos,0,None,0)
+                if pos == n and (len(self._F) == 0 or q in self._F):
+                    return self._witness(input,k,configs,parents),count
+                if instrument is not None:
+                    instrument.deadEnd('vacant' if pos < n else 'stop')
+                continue
+            (g,rest) = stack.pop()
+            if pos == n:# No more input
+                f: tuple[str,str,str] = (q,'',g)
+                nextPos: int = pos
+            else:
+                f = (q,input[pos],g)
+                nextPos = pos+1
+            if f not in self._delta:
+                if instrument is not None:
+                    instrument.configuration(q,pos,stack.size(),f,0)
+                    instrument.deadEnd('undefined')
+                continue
+            if instrument is not None:
+                instrument.configuration(q,pos,stack.size(),f,len(self._delta[f]))
+            for (p,Z) in self._delta[f]:
+                c = (p,nextPos,rest.pushList(Z))
+                if c not in seen:
+                    seen.add(c)
+                    configs.append(c)
+                    parents.append((k,f,Z))
+                    queue.append(len(configs)-1)
+        if pruned:
+            raise BudgetExceeded('height')
+        return None,count
+
+    def _witness(self, input:str, k:int, configs:list[tuple[str,int,PStack[str]]], parents:list[tuple[int,tuple[str,str,str],list[str]]|None]) -> Trace:
+        """
+        Trace of the run reaching the k-th configuration
+        """
+        (q,pos,stack) = configs[k]
+        steps: list[Step] = [Step(q,pos,stack.size(),None,None)]
+        parent = parents[k]
+        while parent is not None:
+            (k,f,Z) = parent
+            (q,pos,stack) = configs[k]
+            steps.append(Step(q,pos,stack.size(),f,Z))
+            parent = parents[k]
+        steps.reverse()
+        return Trace(input,self._Z_0,steps)
+
+    def findAcceptingRunParallel(self, input : str, workers : int|None = None, depth = 16, maxConfigurations = 50000,
+                                 budget : Budget|None = None) -> tuple[Trace|None, int]:
+        """
+        Search an accepting run breadth-first in worker processes
+
+        The frontier of the search is partitioned among the workers. Each worker explores
+        its part for at most depth levels and maxConfigurations configurations, merging the configurations
+        it has seen, and returns the new frontier, which is merged again over all workers.
+        All workers stop as soon as one of them finds an accepting configuration.
+        budget is checked on each configuration of the merged frontier as in findAcceptingRun(),
+        and DEFAULT_BUDGET is used for an automaton having epsilon cycles if budget is None.
+
+        Returns
+        ---
+        (trace,count) as in findAcceptingRun()
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        start: tuple[str,int,tuple[str,...]] = (self._q_0,0,(self._Z_0,))# stack is a tuple, the top last
+        # parents[c]: configuration from which c is reached and the transitions (f,p,Z) taken
+        parents: dict[tuple[str,int,tuple[str,...]],tuple[tuple[str,int,tuple[str,...]],list[tuple[tuple[str,str,str],str,list[str]]]]] = dict()
+        seen: set[tuple[str,int,tuple[str,...]]] = {start}
+        frontier: list[tuple[str,int,tuple[str,...]]] = [start]
+        count: int = 0
+        if budget is None and len(self.epsilonCycles()) > 0:
+            budget = NPDA.DEFAULT_BUDGET
+        guard: BudgetGuard|None = None if budget is None else budget.guard()
+        reason: str|None = None
+        pruned: bool = False# some configurations are higher than maxHeight
+        stop = multiprocessing.Event()
+        with multiprocessing.Pool(workers,_initSearch,(self,input,stop)) as pool:
+            while frontier:
+                m: int = min(len(frontier),2*workers)
+                chunks = [frontier[i::m] for i in range(m)]
+                newFrontier: list[tuple[str,int,tuple[str,...]]] = list()
+                tasks = [(chunk,depth,maxConfigurations) for chunk in chunks]
+                for (k,(found,explored,leaves)) in pool.imap_unordered(_searchChunk,enumerate(tasks)):
+                    count += explored
+                    if guard is not None and not found:# The configurations explored by the worker
+                        reason = guard.check(0,len(newFrontier),explored)
+                        if reason is not None:
+                            stop.set()
+                            raise BudgetExceeded(reason)
+                    for (i,steps,c) in leaves:
+                        if found:# The transitions without input are completed here
+                            stop.set()
+                            if c not in seen:
+                                parents[c] = (chunks[k][i],steps)
+                            return self._witnessParallel(input,c,parents,self._epsilonRun(c[0],c[2])),count
+                        if c in seen:
+                            continue
+                        if guard is not None:
+                            reason = guard.check(len(c[2]),len(newFrontier),0)
+                            if reason == 'height':
+                                pruned = True
+                                continue
+                            if reason is not None:
+                                stop.set()
+                                raise BudgetExceeded(reason)
+                        seen.add(c)
+                        parents[c] = (chunks[k][i],steps)
+                        newFrontier.append(c)
+                frontier = newFrontier
+        if pruned:
+            raise BudgetExceeded('height')
+        return None,count
+
+    def _epsilonRun(self, q:str, stack:tuple[str,...]) -> list[tuple[tuple[str,str,str],str,list[str]]]:
+        """
+        Transitions without input from state q with stack (the top last) to an accepting configuration,
+        searched breadth-first, which ends since such a run exists by epsilonSummaries()
+        """
+        first: tuple[str,PStack[str]] = (q,PStack(stack))
+        parents: dict[tuple[str,PStack[str]],tuple[tuple[str,PStack[str]],tuple[tuple[str,str,str],str,list[str]]]|None] = {first:None}
+        queue: deque[tuple[str,PStack[str]]] = deque([first])
+        while queue:
+            c = queue.popleft()
+            (p,s) = c
+            if s.is_empty():
+                if len(self._F) == 0 or p in self._F:
+                    steps: list[tuple[tuple[str,str,str],str,list[str]]] = list()
+                    parent = parents[c]
+                    while parent is not None:
+                        steps.append(parent[1])
+                        parent = parents[parent[0]]
+                    steps.reverse()
+                    return steps
+                continue
+            (g,rest) = s.pop()
+            f: tuple[str,str,str] = (p,'',g)
+            for (r,Z) in self._delta.get(f,[]):
+                d = (r,rest.pushList(Z))
+                if d not in parents:
+                    parents[d] = (c,(f,r,Z))
+                    queue.append(d)
+        return []
+
+    def _witnessParallel(self, input:str, c:tuple[str,int,tuple[str,...]], parents:dict,
+                         tail:list[tuple[tuple[str,str,str],str,list[str]]]) -> Trace:
+        """
+        Trace of the run reaching the configuration c, followed by the transitions of tail
+        """
+        segments: list[list[tuple[tuple[str,str,str],str,list[str]]]] = [tail]
+        while c in parents:
+            (c,steps) = parents[c]
+            segments.append(steps)
+        (q,pos,stack) = c
+        height: int = len(stack)
+        trace: Trace = Trace(input,self._Z_0)
+        for steps in reversed(segments):
+            for (f,p,Z) in steps:
+                trace.append(Step(q,pos,height,f,Z))
+                if f[1] != '':
+                    pos += 1
+                height += len(Z)-1
+                q = p
+        trace.append(Step(q,pos,height,None,None))
+        return trace
+
+    def compile(self) -> CompiledPDA:
+        """
+        Intern the symbols into integers and build flat transition tables, see DPDA.compile()
+        """
+        return CompiledPDA.fromPda(self,False)
+
+    def acceptsPolynomial(self, input : str) -> bool:
+        """
+        accepts() through the CFG given by toCfg(), in time cubic in the length of the input at worst
+
+        Only an automaton without transitions without input and accepting by empty stack (F is empty)
+        is supported, since the grammar takes transitions without input anywhere in the input and ignores F.
+        """
+        if len(self._F) > 0:
+            raise ValueError('acceptsPolynomial() needs an automaton accepting by empty stack, F must be empty')
+        if any(a == '' for (_,a,_) in self._delta):
+            raise ValueError('acceptsPolynomial() needs an automaton without transitions without input')
+        return self.toCfg().accepts(input)
+
+    def writeLatex(self, fp : TextIO) -> None:
+        """
+        Write the definition of this automaton in LaTeX to fp, a row for each transition
+        """
+        self._writeElements(fp)
         for e in self._delta.keys():
             (q,a,s) = e
-            text += f'\\delta\\left({q},{DPDA._toText(a)},'
-            if len(s) == 0:
-                text += '\\epsilon'
-            else:
-                for ss in s:
-                    text += f'{ss}'
-#                    text += f'{DPDA._toText(ss)}'
-            text += '\\right)&=\\set{'
             outputs: list[tuple[str, list[str]]] = self._delta[e]
-            for (p,s) in outputs:
-                text += '\\left('
-                text += f'{q},'
-                if len(s) == 0:
-                    text += '\\epsilon'
-                else:
-                    for ss in s:
-                        text += f'{ss}'
-#                        text += f'{DPDA._toText(ss)}'
-                text += '\\right),'
-            text = text.removesuffix(',')
-            text += '}\\\\\n'
-        return text
+            right = ','.join(f'\\left({q},{DPDA._latexStack("".join(Z))}\\right)' for (p,Z) in outputs)
+            fp.write(f'\\delta\\left({q},{DPDA._toText(a)},{DPDA._latexStack(s)}\\right)&=\\set{{{right}}}\\\\\n')
 
-    def toCfg(self) -> CFG:
+    def toCfg(self, instrument : Instrument|None = None, cache : ConversionCache|None = None) -> CFG:
         """
         Convert this NPDA to CFG in Greibach normal form
+
+        The result is looked up in cache, cache.defaultCache if None, under the hash of (q_0,delta,F,Z_0);
+        temporaryP is None if the result is given from the cache.
+        The time of each phase is recorded to instrument if given.
+        """
+        if cache is None:
+            cache = defaultCache
+        self._temporaryP = None
+        return cache.lookup(ConversionCache.key('NPDA.toCfg',self.canonical()),lambda: self._toCfg(instrument))
+
+    def canonical(self) -> list:
+        """
+        (q_0,delta,F,Z_0) in a canonical form, the order of the alternatives of a transition is kept
         """
+        delta = [[list(f),[[p,list(Z)] for (p,Z) in self._delta[f]]] for f in sorted(self._delta)]
+        return [self._q_0,delta,sorted(self._F),self._Z_0]
+
+    def _toCfg(self, instrument : Instrument|None) -> CFG:
+        """
+        Only the triples [pAq] reachable from S are generated.
+        A push of B1B2...Bk (k>2) is split as [q1 B1 r][r <B2,...,Bk> t], where <B2,...,Bk> stands for
+        B2 on the top of <B3,...,Bk>. [r <B2,...,Bk> t] is given a rule a [q1 <Z> s][s <B3,...,Bk> t]
+        for each transition of (r,a,B2) pushing Z, so that the rules of [r B2 s] are not copied
+        for every t and no rule has more than two nonterminals.
+        """
+        byTop: dict[tuple[str,str],list[tuple[str,str,list[str]]]] = dict()
+        for k in self._delta.keys():# an element of transition functions
+            (q, a, A) = k# variables of transition functions, state q, alphabet a, stack alphabet A
+            for (q1, pushList) in self._delta[k]:# destination state q1, stack push list pushList
+                byTop.setdefault((q,A),[]).append((a,q1,pushList))
+        sequences: dict[str,tuple[str,...]] = dict()# stack symbol standing for a sequence of symbols
+
+        def split(Z:list[str]) -> str:
+            if len(Z) == 1:
+                return Z[0]
+            name = f'<{",".join(Z)}>'
+            sequences[name] = tuple(Z)
+            return name
+
+        generated: dict[TR,list[list[TR]]] = dict()
+
+        def rules(key:TR) -> list[list[TR]]:
+            if key in generated:
+                return generated[key]
+            (q, A, qLast) = key
+            output: list[list[TR]] = list()
+            generated[key] = output
+            if A in sequences:
+                (B, *rest) = sequences[A]
+                tail: str = split(rest)
+                for (a, q1, pushList) in byTop.get((q,B),[]):
+                    if len(pushList) == 0:
+                        output.append([TR(a,None,None), TR(q1, tail, qLast)])
+                    else:
+                        for p in self._states:
+                            output.append([TR(a,None,None), TR(q1, split(pushList), p), TR(p, tail, qLast)])
+                return output
+            for (a, q1, pushList) in byTop.get((q,A),[]):
+                if len(pushList) == 0:# if pushList is empty
+                    if q1 == qLast:
+                        output.append([TR(a,None,None)])
+                elif len(pushList) == 1:
+                    output.append([TR(a,None,None), TR(q1, pushList[0], qLast)])
+                else:
+                    for p in self._states:
+                        output.append([TR(a,None,None), TR(q1, pushList[0], p), TR(p, split(pushList[1:]), qLast)])
+            return output
+
         P:dict[TR,list[list[TR]]] = dict()
         # Initial rule
         S = TR('S','S','S')
         P[S] = list()
         for q in self._states:
             P[S].append([TR(self._q_0, self._Z_0, q)])
-        
-        # Convert transition functions to production rules
-        for k in self._delta.keys():# an element of transition functions
-            (q, a, A) = k# variables of transition functions, state q, alphabet a, stack alphabet A
-            for v in self._delta[k]:
-                (q1, pushList) = v# destination state q1, stack push list pushList
-                if len(pushList) == 0:# if pushList is empty
-                    key = TR(q, A, q1)
-                    if not (key in P.keys()):
-                        P[key]=list()
-                    P[key].append([TR(a,None,None)])
-                else:
-                    for qLast in self._states:
-                        key = TR(q, A, qLast)
-                        if not (key in P.keys()):
-                            P[key]=list()
-                        pushListDummy = list(pushList)
-                        self._push2N(key, [TR(a,None,None)], P[key], q1, qLast,pushListDummy,P)
+        with NPDA._phase(instrument,'rules'):
+            # Convert transition functions to production rules of the triples reachable from S
+            queue: list[TR] = [rule[0] for rule in P[S]]
+            while queue:
+                key: TR = queue.pop()
+                if key in P:
+                    continue
+                P[key] = rules(key)
+                for rule in P[key]:
+                    for d in rule[1:]:
+                        if d not in P:
+                            queue.append(d)
         self._temporaryP = P
-        tKeys = NPDA._removeUnterminated(P,S)
+        with NPDA._phase(instrument,'_removeUnterminated'):
+            tKeys = NPDA._removeUnterminated(P,S)
         # pprint.pprint(P)
-        PP = NPDA._createNewP(P,tKeys)
+        with NPDA._phase(instrument,'_reachable'):
+            rKeys = NPDA._reachable(P,S,tKeys)
+        with NPDA._phase(instrument,'_createNewP'):
+            PP = NPDA._createNewP(P,rKeys)
         return CFG(PP,str(S))
 
-
-    def _push2N(self, k:TR, output:list[TR], outputList:list[list[TR]], q:str, qLast:str, pushList:list[str],P:dict[TR,list[list[TR]]]) -> None:
-        S = pushList[0]
-        if len(pushList) == 1:
-            output.append(TR(q,S,qLast))
-            outputList.append(output)
-            # pprint.pprint(P)
-            return
-
-        for p in self._states:
-            newOutput=list(output)
-            newOutput.append(TR(q, S, p))
-            self._push2N(k,newOutput,outputList,p,qLast,pushList[1:],P)
+    @staticmethod
+    def _phase(instrument:Instrument|None, name:str) -> ContextManager[None]:
+        if instrument is None:
+            return nullcontext()
+        return instrument.phase(name)
 
 
-    @staticmethod
-    def _copyP(P:dict[TR,list[list[TR]]]) -> dict[TR,list[list[TR]]]:
-        PP:dict[TR,list[list[TR]]] = dict()
-        for k in P.keys():
-            dList: list[list[TR]] = P[k]
-            PP[k]=list()
-            for d in dList:
-                PP[k].append(d)
-        return PP
-    
     @staticmethod
     def _removeUnterminated(P:dict[TR,list[list[TR]]],S:TR) -> set[TR]:
         """
         生成規則の左辺の非終端記号からから終端記号くものだけを残す
+
+        規則ごとに、終端記号へ至ると分かっていない非終端記号の出現数を数え、
+        0になった規則の左辺を作業リストから伝播する (規則の大きさの総和に比例する時間)
         """
-        #生成規則のダミーを作る
-        PP:dict[TR,list[list[TR]]] = NPDA._copyP(P)
-        keys = PP.keys()
         tKeys:set[TR] = set()
-        tKeys.add(S)#開始記号は登録する
-        while True:
-            for k in keys:#右辺が終端記号だけのものを抽出
-                lList  = PP[k]
-                terminate = False
-                for dl in lList:
-                    if len(dl) == 0:
-                        terminate = True
-                    if (len(dl)==1) and (dl[0].S is None):
-                        terminate = True
-                if terminate:#終端記号を導くものを登録する
+        owners:list[TR] = list()#規則の左辺
+        counts:list[int] = list()#規則の右辺で未確定の非終端記号の出現数
+        occurrences:dict[TR,list[int]] = dict()#非終端記号が出現する規則
+        queue:list[TR] = list()
+        for k in P:
+            for dl in P[k]:
+                r = len(counts)
+                c = 0
+                for d in dl:
+                    if d.S is not None:#非終端記号
+                        c += 1
+                        occurrences.setdefault(d,[]).append(r)
+                owners.append(k)
+                counts.append(c)
+                if c == 0 and not (k in tKeys):#右辺が終端記号だけのもの
                     tKeys.add(k)
-                    PP[k]=[[]]#ダミー生成規則の右辺の空にする
-            # pprint.pprint(PP)
-            find = False
-            #まだ、終端記号へと至ると分からない記号を確認
-            for k in keys:
-                if not (k in tKeys):
-                    dList = PP[k]
-                    for dll in dList:
-                        dl = list(dll)
-                        for kt in tKeys:
-                            if kt in dl:
-                                dl.remove(kt)
-                        if (len(dl)==1) and (dl[0].S is None):
-                            #右辺には全て終端記号へ至る非終端記号
-                            PP[k]=[[]]
-                            tKeys.add(k)
-                            find=True
-                    
-            if not find:#新たな終端記号を導く非終端記号は見つからない
-                break#終了
-
+                    queue.append(k)
+        while queue:
+            d = queue.pop()
+            for r in occurrences.get(d,[]):
+                counts[r] -= 1
+                k = owners[r]
+                if counts[r] == 0 and not (k in tKeys):#右辺には全て終端記号へ至る非終端記号
+                    tKeys.add(k)
+                    queue.append(k)
+        tKeys.add(S)#開始記号は登録する
         return tKeys
 
+    @staticmethod
+    def _reachable(P:dict[TR,list[list[TR]]],S:TR,tKeys:set[TR]) -> set[TR]:
+        """
+        終端記号へ至る非終端記号のうち、開始記号から到達できるもの
+        """
+        rKeys:set[TR] = {S}
+        queue:list[TR] = [S]
+        while queue:
+            k = queue.pop()
+            for dl in P.get(k,[]):
+                if all((d.S is None) or (d in tKeys) for d in dl):#終端記号へ至る規則だけをたどる
+                    for d in dl:
+                        if (d.S is not None) and not (d in rKeys):
+                            rKeys.add(d)
+                            queue.append(d)
+        return rKeys
+
     @staticmethod
     def _createNewP(P:dict[TR,list[list[TR]]],tKeys:set[TR]) -> dict[str, list[list[str]]]:
         """
@@ -525,5 +1436,94 @@ class NPDA(DPDA):
     def temporaryP(self) -> None:
         pass
     @temporaryP.getter
-    def temporaryP(self) -> dict[TR, list[list[TR]]]:
-        return self._temporaryP
\ No newline at end of file
+    def temporaryP(self) -> dict[TR, list[list[TR]]]|None:
+        return self._temporaryP
+
+
+################################################################
+# Worker of readMany()
+_workerPda: DPDA|None = None
+_workerCompiled: CompiledPDA|None = None
+_workerTrace: bool = False
+_workerLatex: bool = False
+
+def _initWorker(pda:DPDA, trace:bool, latex:bool) -> None:
+    global _workerPda, _workerCompiled, _workerTrace, _workerLatex
+    _workerPda = pda
+    _workerCompiled = None if trace else pda.compile()
+    _workerTrace = trace
+    _workerLatex = latex
+
+def _readOneInWorker(item:tuple[int,str]) -> tuple[int,object]:
+    return _readOne(_workerPda,_workerCompiled,_workerTrace,_workerLatex,item)# type: ignore[arg-type]
+
+def _readOne(pda:DPDA, compiled:CompiledPDA|None, trace:bool, latex:bool, item:tuple[int,str]) -> tuple[int,object]:
+    (i,input) = item
+    if trace:
+        return i,pda.read(input,latex)
+    return i,compiled.accepts(input)# type: ignore[union-attr]
+
+
+################################################################
+# Worker of findAcceptingRunParallel()
+_searchPda: 'NPDA|None' = None
+_searchInput: str = ''
+_searchStop = None
+
+def _initSearch(npda:'NPDA', input:str, stop) -> None:
+    global _searchPda, _searchInput, _searchStop
+    _searchPda = npda
+    _searchInput = input
+    _searchStop = stop
+
+def _searchChunk(task:tuple[int,tuple[list[tuple[str,int,tuple[str,...]]],int,int]]) -> tuple[int,tuple[bool,int,list]]:
+    """
+    Explore from the configurations of a chunk
+
+    Returns
+    ---
+    (index of the chunk,(found,count,leaves)) where leaves are (index of the configuration in the chunk,
+    transitions taken,configuration reached); if found, leaves has only the configuration at the end
+    of the input from which the transitions without input are accepted by epsilonSummaries()
+    """
+    (k,(seeds,depth,maxConfigurations)) = task
+    npda: NPDA = _searchPda# type: ignore[assignment]
+    delta = npda.delta
+    F: set[str] = npda.F
+    summaries: dict[tuple[str,str],set[str]] = npda.epsilonSummaries()
+    input: str = _searchInput
+    n: int = len(input)
+    seen: set[tuple[str,int,PStack[str]]] = set()
+    level: list[tuple[int,list,tuple[str,int,PStack[str]]]] = list()
+    for i,(q,pos,stack) in enumerate(seeds):
+        c = (q,pos,PStack(stack))
+        seen.add(c)
+        level.append((i,[],c))
+    count: int = 0
+    for _ in range(depth):
+        if count >= maxConfigurations or _searchStop.is_set():# type: ignore[union-attr]
+            break
+        nextLevel: list[tuple[int,list,tuple[str,int,PStack[str]]]] = list()
+        for (i,steps,(q,pos,stack)) in level:
+            count += 1
+            if pos == n:# No more input, the stack is popped by the summaries
+                states: set[str] = {q}
+                for g in stack:
+                    states = {s for p in states for s in summaries.get((p,g),())}
+                    if len(states) == 0:
+                        break
+                if len(states) > 0 and (len(F) == 0 or not states.isdisjoint(F)):
+                    return k,(True,count,[(i,steps,(q,pos,tuple(reversed(list(stack)))))])
+                continue
+            if stack.is_empty():# stack is empty
+                continue
+            (g,rest) = stack.pop()
+            f: tuple[str,str,str] = (q,input[pos],g)
+            for (p,Z) in delta.get(f,[]):
+                c = (p,pos+1,rest.pushList(Z))
+                if c not in seen:
+                    seen.add(c)
+                    nextLevel.append((i,steps+[(f,p,Z)],c))
+        level = nextLevel
+    leaves = [(i,steps,(q,pos,tuple(reversed(list(stack))))) for (i,steps,(q,pos,stack)) in level]
+    return k,(False,count,leaves)
@@ -0,0 +1,96 @@
+from typing import TYPE_CHECKING, Iterable, Sequence
+if TYPE_CHECKING:
+    from pda import NPDA
+
+# Stack top not known after a pop
+UNKNOWN: str = ''
+
+
+class PreFilter:
+    """
+    Finite automaton over-approximating NPDA, which rejects inputs in linear time
+
+    A state of the automaton is (q,g), the state of NPDA and the top of the stack,
+    where g is UNKNOWN after a pop. Only the top pushed by a transition is followed and
+    the rest of the stack is forgotten, so every input accepted by NPDA passes the filter.
+    (q,g) is kept only if g can be popped at all, see NPDA.popSummaries().
+    The subsets of the states are determinized lazily and each input symbol costs a dictionary lookup.
+    """
+
+    def __init__(self, npda:'NPDA') -> None:
+        self._delta = npda.delta
+        self._mixed: dict[tuple[str,str],set[str]] = npda.popSummaries()[1]
+        epsilon: dict[tuple[str,str],set[str]] = npda.epsilonSummaries()
+        F: set[str] = npda.F
+        self._stackAlphabet: set[str] = npda.stackAlphabet | {npda.Z}
+        # Transitions with input by (q,a) for an unknown top
+        self._byState: dict[tuple[str,str],list[tuple[str,list[str]]]] = dict()
+        for (q,a,g) in self._delta:
+            if a != '':
+                self._byState.setdefault((q,a),[]).extend(self._delta[(q,a,g)])
+        # States from which the end of the input may be accepted
+        self._ending: set[tuple[str,str]] = {(q,g) for (q,g) in epsilon if len(epsilon[(q,g)]) > 0}
+        for q in npda.states | {npda.q_0}:
+            if len(F) == 0 or q in F or any((q,g) in self._ending for g in self._stackAlphabet):
+                self._ending.add((q,UNKNOWN))
+        start: frozenset[tuple[str,str]] = self._prune({(npda.q_0,npda.Z)})
+        self._start: frozenset[tuple[str,str]] = start
+        self._next: dict[tuple[frozenset[tuple[str,str]],str],frozenset[tuple[str,str]]] = dict()
+        self._accepting: dict[frozenset[tuple[str,str]],bool] = dict()
+
+    def _prune(self, states:Iterable[tuple[str,str]]) -> frozenset[tuple[str,str]]:
+        return frozenset(c for c in states if c[1] == UNKNOWN or len(self._mixed.get(c,())) > 0)
+
+    def _step(self, states:frozenset[tuple[str,str]], a:str) -> frozenset[tuple[str,str]]:
+        key = (states,a)
+        if key in self._next:
+            return self._next[key]
+        result: set[tuple[str,str]] = set()
+        for (q,g) in states:
+            alternatives = self._byState.get((q,a),[]) if g == UNKNOWN else self._delta.get((q,a,g),[])
+            for (p,Z) in alternatives:
+                result.add((p,Z[0] if len(Z) > 0 else UNKNOWN))
+        self._next[key] = self._prune(result)
+        return self._next[key]
+
+    def _accepts(self, states:frozenset[tuple[str,str]]) -> bool:
+        if states not in self._accepting:
+            self._accepting[states] = any(c in self._ending for c in states)
+        return self._accepting[states]
+
+    def check(self, input:str) -> int|None:
+        """
+        None if input passes the filter, otherwise the number of symbols read when it is rejected,
+        which is len(input) if it is rejected at the end
+        """
+        states: frozenset[tuple[str,str]] = self._start
+        for i,a in enumerate(input):
+            if len(states) == 0:
+                return i
+            states = self._step(states,a)
+        if not self._accepts(states):
+            return len(input)
+        return None
+
+    def passes(self, input:str) -> bool:
+        """
+        False if NPDA never accepts input
+        """
+        return self.check(input) is None
+
+    def partition(self, inputs:Sequence[str]) -> tuple[list[int], list[int]]:
+        """
+        Indices of the inputs passed on to NPDA and those rejected by the filter
+
+        Returns
+        ---
+        (passed,rejected)
+        """
+        passed: list[int] = list()
+        rejected: list[int] = list()
+        for i,input in enumerate(inputs):
+            if self.check(input) is None:
+                passed.append(i)
+            else:
+                rejected.append(i)
+        return passed,rejected
@@ -0,0 +1,218 @@
+from typing import NamedTuple, Iterator, TextIO
+
+
+class Step(NamedTuple):
+    """
+    A configuration in a run of PDA and the transition taken from it
+    """
+    q:str# state
+    pos:int# offset of the remaining input
+    height:int# height of the stack
+    f:tuple[str,str,str]|None# key of the transition taken, None for the last configuration
+    Z:list[str]|None# symbols pushed by the transition
+
+    def __str__(self) -> str:
+        return f'({self.q},{self.pos},{self.height})'
+
+
+class Trace:
+    """
+    Sequence of configurations recorded as Step
+
+    Only the state, the input offset and the transition are kept for each step.
+    The contents of the stack are recovered by replaying the transitions
+    when the configurations are rendered.
+    """
+
+    def __init__(self, inputStr:str, Z_0:str, steps:list[Step]|None = None) -> None:
+        """
+        Constructor
+
+        Parameters
+        ---
+        inputStr Input string of the run
+
+        Z_0 Stack bottom symbol
+
+        steps Steps recorded so far
+        """
+        self._input: str = inputStr
+        self._Z_0: str = Z_0
+        self._steps: list[Step] = list() if steps is None else steps
+
+    def append(self, step:Step) -> None:
+        self._steps.append(step)
+
+    def copy(self) -> 'Trace':
+        return Trace(self._input, self._Z_0, list(self._steps))
+
+    def __len__(self) -> int:
+        return len(self._steps)
+
+    def __getitem__(self, k:int) -> Step:
+        return self._steps[k]
+
+    def __iter__(self) -> Iterator[Step]:
+        return iter(self._steps)
+
+    def stacks(self) -> Iterator[list[str]]:
+        """
+        Replay the run and yield the stack of each configuration, the bottom first
+
+        The same list is updated and yielded at every step.
+        """
+        stack: list[str] = [self._Z_0]
+        for step in self._steps:
+            yield stack
+            if step.f is None:
+                break
+            stack.pop()
+            stack.extend(reversed(step.Z or []))
+
+    def render(self, latex = False) -> list[str]:
+        """
+        Sequence of configurations in text or LaTeX format
+        """
+        return list(self.lines(latex))
+
+    def lines(self, latex = False) -> Iterator[str]:
+        """
+        Configurations in text or LaTeX format, one at a time
+        """
+        for k,stack in enumerate(self.stacks()):
+            step: Step = self._steps[k]
+            yield Trace._mkStr(step.q,k > 0,self._input[step.pos:],stack,latex)
+
+    def write(self, fp:TextIO, latex = False) -> None:
+        """
+        Write the configurations to fp, a line for each configuration
+        """
+        for line in self.lines(latex):
+            fp.write(line)
+            fp.write('\n')
+
+    def renderStep(self, k:int, latex = False) -> str:
+        """
+        The k-th configuration in text or LaTeX format
+        """
+        k = range(len(self._steps))[k]
+        for j,stack in enumerate(self.stacks()):
+            if j == k:
+                step: Step = self._steps[k]
+                return Trace._mkStr(step.q,k > 0,self._input[step.pos:],stack,latex)
+        raise IndexError(k)
+
+    @staticmethod
+    def _mkStr(q:str,follow:bool,inputStr:str,stack:list[str],latex:bool) -> str:
+        ss:str = ''
+        if follow:
+            if latex:
+                ss = '\\vdash'
+            else:
+                ss = '|-'
+        if latex:
+            if len(inputStr) > 0:
+                ss += f'\\left({q},\\text{{{inputStr}}},{Trace._mkStackStr(stack,latex)}\\right)'
+            else:
+                ss += f'\\left({q},\\epsilon,{Trace._mkStackStr(stack,latex)}\\right)'
+        else:
+            ss += f'({q},{inputStr},{Trace._mkStackStr(stack,latex)})'
+        return ss
+
+    @staticmethod
+    def _mkStackStr(stack:list[str],latex:bool) -> str:
+        if latex and len(stack) == 0:
+            return '\\epsilon'
+        return f'[{",".join(map(str, stack))}]'
+
+    @property
+    def input(self) -> str:
+        return self._input
+
+
+class RunNode:
+    """
+    A step in a tree of runs, the steps before it are shared through parent with the other runs
+    """
+    __slots__ = ('step', 'parent', 'depth')
+
+    def __init__(self, step:Step, parent:'RunNode|None') -> None:
+        self.step: Step = step
+        self.parent: RunNode|None = parent
+        self.depth: int = 1 if parent is None else parent.depth+1# number of steps up to this node
+
+    def path(self) -> list[Step]:
+        """
+        Steps from the first configuration to this node
+        """
+        steps: list[Step] = [self.step]*self.depth
+        node: RunNode|None = self
+        k: int = self.depth
+        while node is not None:
+            k -= 1
+            steps[k] = node.step
+            node = node.parent
+        return steps
+
+
+class RunTree:
+    """
+    Runs of NPDA on an input as a tree of steps
+
+    Each run is given by its last step, and a Trace of a run is built only when it is requested.
+    """
+
+    def __init__(self, inputStr:str, Z_0:str) -> None:
+        self._input: str = inputStr
+        self._Z_0: str = Z_0
+        self._leaves: list[tuple[bool,str,RunNode]] = list()
+
+    def add(self, result:bool, message:str, leaf:RunNode) -> None:
+        self._leaves.append((result,message,leaf))
+
+    def runs(self, acceptingOnly = False) -> Iterator[tuple[bool,str,Trace]]:
+        """
+        (result,message,trace) of each run in the order the runs ended, only the accepted runs if acceptingOnly
+        """
+        for (result,message,leaf) in self._leaves:
+            if result or not acceptingOnly:
+                yield result,message,self.trace(leaf)
+
+    def accepting(self) -> Iterator[Trace]:
+        """
+        Traces of the accepted runs
+        """
+        for (_,_,trace) in self.runs(True):
+            yield trace
+
+    def trace(self, leaf:RunNode) -> Trace:
+        """
+        Trace of the run ending with leaf
+        """
+        return Trace(self._input,self._Z_0,leaf.path())
+
+    def size(self) -> int:
+        """
+        Number of distinct steps stored in the tree
+        """
+        seen: set[int] = set()
+        for (_,_,leaf) in self._leaves:
+            node: RunNode|None = leaf
+            while node is not None and id(node) not in seen:
+                seen.add(id(node))
+                node = node.parent
+        return len(seen)
+
+    def __len__(self) -> int:
+        return len(self._leaves)
+
+    def __iter__(self) -> Iterator[tuple[bool,str,Trace]]:
+        return self.runs()
+
+    @property
+    def leaves(self) -> list[tuple[bool,str,RunNode]]:
+        return self._leaves
+
+    @property
+    def input(self) -> str:
+        return self._input
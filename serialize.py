@@ -0,0 +1,250 @@
+"""
+Saving and loading DPDA, NPDA and CFG
+
+The binary format consists of a header and sections, all the integers are 32 bit in the byte order
+given in the header. A symbol table is the number of symbols, the offsets of the symbols in UTF-8
+and the symbols themselves; an array is the number of elements and the elements.
+An automaton is saved as the tables of CompiledPDA, so that loadCompiled() maps a file into memory
+and uses its pages as the transition tables without copying, shared among processes.
+Only the symbol tables and the scratch data of CompiledPDA, such as the index of the input symbols,
+are allocated in each process; the tables are copied if the byte order of the file differs.
+
+    DPDA, NPDA: states, alphabet, stackAlphabet (tables), [q_0,Z_0], F, stateUsed, stackUsed,
+                start, target, pushStart, pushLen, pool (arrays)
+    CFG:        symbols (table), [S], heads, ruleStart, symbolStart, pool (arrays)
+
+stateUsed and stackUsed mark the symbols appearing in delta, which are the states and the stack alphabet of the automaton.
+
+The JSON format keeps the dictionaries as they are written in the notebooks.
+"""
+import json
+import mmap
+import struct
+import sys
+from array import array
+from typing import Any
+from pda import DPDA, NPDA
+from cfg import CFG
+from compiled import CompiledPDA
+
+MAGIC: bytes = b'PDA\x00'
+VERSION: int = 1
+HEADER: struct.Struct = struct.Struct('<4sBBBx')# magic, version, kind, byte order
+KINDS: dict[type,int] = {DPDA:ord('D'), NPDA:ord('N'), CFG:ord('C')}
+LITTLE: int = 0
+BIG: int = 1
+
+
+################################################################
+# Binary format
+def save(obj:DPDA|CFG, path:str) -> None:
+    """
+    Save DPDA, NPDA or CFG to path in the binary format
+    """
+    with open(path,'wb') as fp:
+        fp.write(dumps(obj))
+
+
+def dumps(obj:DPDA|CFG) -> bytes:
+    kind: int = KINDS[type(obj)]
+    out: bytearray = bytearray(HEADER.pack(MAGIC,VERSION,kind,LITTLE if sys.byteorder == 'little' else BIG))
+    if isinstance(obj,CFG):
+        _dumpCfg(obj,out)
+    else:
+        _dumpPda(obj,out)
+    return bytes(out)
+
+
+def _dumpPda(pda:DPDA, out:bytearray) -> None:
+    compiled: CompiledPDA = pda.compile()
+    stateUsed = array('i',(1 if s in pda.states else 0 for s in compiled.states))
+    stackUsed = array('i',(1 if s in pda.stackAlphabet else 0 for s in compiled.stackAlphabet))
+    for table in (compiled.states,compiled.alphabet,compiled.stackAlphabet):
+        _writeTable(out,table)
+    (q_0,Z_0,F,start,target,pushStart,pushLen,pool) = compiled.tables()
+    _writeArray(out,array('i',[q_0,Z_0]))
+    for a in (array('i',F),stateUsed,stackUsed,start,target,pushStart,pushLen,pool):
+        _writeArray(out,a)
+
+
+def _dumpCfg(cfg:CFG, out:bytearray) -> None:
+    symbols: list[str] = sorted({cfg.S} | set(cfg.P) | {s for k in cfg.P for rule in cfg.P[k] for s in rule})
+    index: dict[str,int] = {s:i for i,s in enumerate(symbols)}
+    heads: array = array('i')
+    ruleStart: array = array('i')
+    symbolStart: array = array('i')
+    pool: array = array('i')
+    for k in cfg.P:
+        heads.append(index[k])
+        ruleStart.append(len(symbolStart))
+        for rule in cfg.P[k]:
+            symbolStart.append(len(pool))
+            pool.extend(index[s] for s in rule)
+    ruleStart.append(len(symbolStart))
+    symbolStart.append(len(pool))
+    _writeTable(out,symbols)
+    _writeArray(out,array('i',[index[cfg.S]]))
+    for a in (heads,ruleStart,symbolStart,pool):
+        _writeArray(out,a)
+
+
+def _writeTable(out:bytearray, symbols:list[str]) -> None:
+    encoded: list[bytes] = [s.encode('utf-8') for s in symbols]
+    offsets: array = array('i',[0])
+    for e in encoded:
+        offsets.append(offsets[-1]+len(e))
+    _writeArray(out,offsets)
+    data: bytes = b''.join(encoded)
+    out += data
+    out += bytes(-len(data) % 4)# aligned to 4 bytes
+
+
+def _writeArray(out:bytearray, a:array) -> None:
+    out += struct.pack('=i',len(a))
+    out += a.tobytes()
+
+
+class _Reader:
+    """
+    Sections of a buffer read in order
+    """
+
+    def __init__(self, buffer:Any) -> None:
+        self._view: memoryview = memoryview(buffer)
+        (magic,version,kind,order) = HEADER.unpack_from(self._view,0)
+        if magic != MAGIC:
+            raise ValueError('not a file of PDA or CFG')
+        if version != VERSION:
+            raise ValueError(f'unsupported version {version}')
+        self.kind: int = kind
+        # Arrays in the other byte order are copied and swapped
+        self._swap: bool = (order == LITTLE) != (sys.byteorder == 'little')
+        self._length: struct.Struct = struct.Struct('<i' if order == LITTLE else '>i')
+        self._offset: int = HEADER.size
+
+    def array(self) -> Any:
+        (n,) = self._length.unpack_from(self._view,self._offset)
+        self._offset += 4
+        data: memoryview = self._view[self._offset:self._offset+4*n]
+        self._offset += 4*n
+        if self._swap:
+            a: array = array('i',data.tobytes())
+            a.byteswap()
+            return a
+        return data.cast('i')
+
+    def table(self) -> list[str]:
+        offsets = self.array()
+        size: int = offsets[-1]
+        data: bytes = self._view[self._offset:self._offset+size].tobytes()
+        self._offset += size + (-size % 4)
+        return [data[offsets[i]:offsets[i+1]].decode('utf-8') for i in range(len(offsets)-1)]
+
+
+def load(path:str) -> DPDA|CFG:
+    """
+    Load DPDA, NPDA or CFG saved by save()
+    """
+    with open(path,'rb') as fp:
+        return loads(fp.read())
+
+
+def loads(data:bytes) -> DPDA|CFG:
+    reader: _Reader = _Reader(data)
+    if reader.kind == KINDS[CFG]:
+        return _loadCfg(reader)
+    if reader.kind not in (KINDS[DPDA],KINDS[NPDA]):
+        raise ValueError(f'unknown kind {reader.kind}')
+    deterministic: bool = reader.kind == KINDS[DPDA]
+    states: list[str] = reader.table()
+    alphabet: list[str] = reader.table()
+    stackAlphabet: list[str] = reader.table()
+    (q_0,Z_0) = reader.array()
+    (F,stateUsed,stackUsed,start,target,pushStart,pushLen,pool) = [reader.array() for _ in range(8)]
+    nA: int = len(alphabet)
+    nG: int = len(stackAlphabet)
+    delta: dict = dict()
+    for k in range(len(start)-1):
+        if start[k] == start[k+1]:
+            continue
+        f: tuple[str,str,str] = (states[k//(nA*nG)],alphabet[(k//nG)%nA],stackAlphabet[k%nG])
+        alternatives: list[tuple[str,list[str]]] = list()
+        for b in range(start[k],start[k+1]):
+            Z: list[str] = [stackAlphabet[g] for g in pool[pushStart[b]:pushStart[b]+pushLen[b]]]
+            Z.reverse()# pool holds the symbols in the order they are pushed
+            alternatives.append((states[target[b]],Z))
+        delta[f] = alternatives[0] if deterministic else alternatives
+    cls = DPDA if deterministic else NPDA
+    return cls._restore(states[q_0],delta,{s for s,x in zip(states,F) if x},stackAlphabet[Z_0],
+                        {s for s,x in zip(states,stateUsed) if x},set(alphabet[1:]),
+                        {s for s,x in zip(stackAlphabet,stackUsed) if x})
+
+
+def _loadCfg(reader:_Reader) -> CFG:
+    symbols: list[str] = reader.table()
+    (S,) = reader.array()
+    (heads,ruleStart,symbolStart,pool) = [reader.array() for _ in range(4)]
+    P: dict[str,list[list[str]]] = dict()
+    for i,h in enumerate(heads):
+        P[symbols[h]] = [[symbols[s] for s in pool[symbolStart[r]:symbolStart[r+1]]] for r in range(ruleStart[i],ruleStart[i+1])]
+    return CFG(P,symbols[S])
+
+
+def loadCompiled(path:str) -> CompiledPDA:
+    """
+    Map a file saved by save() into memory and use it as the tables of CompiledPDA
+
+    The file is mapped read-only, so that processes loading the same file share its pages.
+    """
+    with open(path,'rb') as fp:
+        buffer: mmap.mmap = mmap.mmap(fp.fileno(),0,access=mmap.ACCESS_READ)
+    reader: _Reader = _Reader(buffer)
+    if reader.kind not in (KINDS[DPDA],KINDS[NPDA]):
+        raise ValueError('not a file of DPDA or NPDA')
+    states: list[str] = reader.table()
+    alphabet: list[str] = reader.table()
+    stackAlphabet: list[str] = reader.table()
+    (q_0,Z_0) = reader.array()
+    (F,_,_,start,target,pushStart,pushLen,pool) = [reader.array() for _ in range(8)]
+    return CompiledPDA(states,alphabet,stackAlphabet,q_0,Z_0,F,reader.kind == KINDS[DPDA],
+                       start,target,pushStart,pushLen,pool)
+
+
+################################################################
+# JSON format
+def toJson(obj:DPDA|CFG) -> dict[str,Any]:
+    """
+    DPDA, NPDA or CFG as a dictionary for JSON
+    """
+    if isinstance(obj,CFG):
+        return {'kind':'CFG','P':obj.P,'S':obj.S}
+    kind: str = 'NPDA' if isinstance(obj,NPDA) else 'DPDA'
+    delta: list[list[Any]] = list()
+    for (q,a,g) in obj.delta:
+        v = obj.delta[(q,a,g)]
+        delta.append([q,a,g,[[p,Z] for (p,Z) in v] if isinstance(obj,NPDA) else [v[0],v[1]]])
+    return {'kind':kind,'q_0':obj.q_0,'delta':delta,'F':sorted(obj.F),'Z_0':obj.Z}
+
+
+def fromJson(data:dict[str,Any]) -> DPDA|CFG:
+    """
+    DPDA, NPDA or CFG from a dictionary given by toJson()
+    """
+    kind: str = data['kind']
+    if kind == 'CFG':
+        return CFG({k:[list(rule) for rule in data['P'][k]] for k in data['P']},data['S'])
+    if kind == 'DPDA':
+        return DPDA(data['q_0'],{(q,a,g):(v[0],list(v[1])) for (q,a,g,v) in data['delta']},set(data['F']),data['Z_0'])
+    if kind == 'NPDA':
+        return NPDA(data['q_0'],{(q,a,g):[(p,list(Z)) for (p,Z) in v] for (q,a,g,v) in data['delta']},set(data['F']),data['Z_0'])
+    raise ValueError(f'unknown kind {kind}')
+
+
+def saveJson(obj:DPDA|CFG, path:str) -> None:
+    with open(path,'w',encoding='utf-8') as fp:
+        json.dump(toJson(obj),fp,ensure_ascii=False)
+
+
+def loadJson(path:str) -> DPDA|CFG:
+    with open(path,encoding='utf-8') as fp:
+        return fromJson(json.load(fp))
@@ -1,6 +1,7 @@
 # %%
+from array import array
 from collections import deque
-from typing import TypeVar, Generic, Sequence
+from typing import TypeVar, Generic, Sequence, Iterator
 
 T = TypeVar("T")
 
@@ -13,7 +14,7 @@ class Stack(Generic[T]):
     def __init__(self, data = None):  # Constructor
         self.elements: deque[T] = deque()
         if data is not None:
-            if isinstance(data, 'Stack'):
+            if isinstance(data, Stack):
                 self.elements = deque(data.elements)
             elif isinstance(data, Sequence):
                 for e in data:
@@ -49,6 +50,190 @@ class Stack(Generic[T]):
         return new_stack
 
 
+class PStack(Generic[T]):
+    """
+    Persistent stack
+
+    The stack is immutable. push() and pop() return another stack sharing
+    the elements below with the original, so that copying a stack is not needed.
+    """
+    __slots__ = ('_top', '_rest', '_size', '_hash')
+
+    def __init__(self, data: Sequence[T]|None = None):  # Constructor, data is given from the bottom
+        self._top: T|None = None
+        self._rest: PStack[T]|None = None
+        self._size: int = 0
+        self._hash: int = hash(())
+        if data is not None:
+            s: PStack[T] = PStack()
+            for e in data:
+                s = s.push(e)
+            self._top, self._rest, self._size, self._hash = s._top, s._rest, s._size, s._hash
+
+    def is_empty(self) -> bool:  # Return True if no element
+        return self._size == 0
+
+    def push(self, e: T) -> 'PStack[T]':  # Return the stack with an element added
+        s: PStack[T] = PStack.__new__(PStack)
+        s._top = e
+        s._rest = self
+        s._size = self._size + 1
+        s._hash = hash((e, self._hash))
+        return s
+
+    def pushList(self, Z: list[T]) -> 'PStack[T]':  # Return the stack with Z added, Z[0] on the top
+        s: PStack[T] = self
+        for z in reversed(Z):
+            s = s.push(z)
+        return s
+
+    def pop(self) -> tuple[T, 'PStack[T]']:  # Return the top element and the stack without it
+        if self._rest is None:
+            raise IndexError('pop from an empty stack')
+        return self._top, self._rest  # type: ignore[return-value]
+
+    def peek(self) -> T:  # Inspect the top element
+        if self._rest is None:
+            raise IndexError('peek from an empty stack')
+        return self._top  # type: ignore[return-value]
+
+    def size(self) -> int:  # Return the number of elements
+        return self._size
+
+    def __iter__(self) -> Iterator[T]:  # Iterate from the top
+        s: PStack[T] = self
+        while s._rest is not None:
+            yield s._top  # type: ignore[misc]
+            s = s._rest
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PStack):
+            return NotImplemented
+        a: PStack[T] = self
+        b: PStack[T] = other
+        while a is not b:# Shared part is not compared
+            if a._size != b._size or a._hash != b._hash or a._top != b._top:
+                return False
+            a = a._rest  # type: ignore[assignment]
+            b = b._rest  # type: ignore[assignment]
+        return True
+
+    def __str__(self) -> str:  # Return the string representation of the stack, the bottom first
+        return f'[{",".join(map(str, reversed(list(self))))}]'
+
+
+class IntStack:
+    """
+    Stack of interned symbols as integers, kept in an array
+
+    mark() records the current contents and rollback() restores them, so that a backtracking
+    search explores the branches in place instead of copying the stack for each branch.
+    Only the cells overwritten below a mark are kept in the undo log, and a pop writes nothing.
+    """
+    __slots__ = ('_data', '_size', '_log', '_marks', '_protected')
+
+    def __init__(self, data: Sequence[int]|None = None):  # Constructor, data is given from the bottom
+        self._data: array = array('i') if data is None else array('i', data)
+        self._size: int = len(self._data)
+        self._log: array = array('i')  # Overwritten cells as pairs of the index and the old value
+        self._marks: array = array('i')  # Size, log length and protected height of each mark
+        self._protected: int = 0  # Cells below this height are restored by rollback()
+
+    def is_empty(self) -> bool:  # Return True if no element
+        return self._size == 0
+
+    def push(self, e: int) -> None:  # Add an element
+        i: int = self._size
+        if i < len(self._data):
+            if i < self._protected:
+                self._log.append(i)
+                self._log.append(self._data[i])
+            self._data[i] = e
+        else:
+            self._data.append(e)
+        self._size = i + 1
+
+    def pushAll(self, symbols: Sequence[int]) -> None:  # Add symbols, the last one on the top
+        for e in symbols:
+            self.push(e)
+
+    def pop(self) -> int:  # Take out an element. The element is removed
+        if self._size == 0:
+            raise IndexError('pop from an empty stack')
+        self._size -= 1
+        return self._data[self._size]
+
+    def peek(self) -> int:  # Inspect the top element
+        if self._size == 0:
+            raise IndexError('peek from an empty stack')
+        return self._data[self._size - 1]
+
+    def size(self) -> int:  # Return the number of elements
+        return self._size
+
+    def mark(self) -> int:
+        """
+        Record the current contents and return the number of the mark
+        """
+        self._marks.append(self._size)
+        self._marks.append(len(self._log))
+        self._protected = max(self._protected, self._size)
+        self._marks.append(self._protected)
+        return len(self._marks) // 3 - 1
+
+    def rollback(self, mark: int) -> None:
+        """
+        Restore the contents recorded by mark, the later marks are discarded and mark remains
+        """
+        marks: array = self._marks
+        size: int = marks[3 * mark]
+        logLength: int = marks[3 * mark + 1]
+        log: array = self._log
+        data: array = self._data
+        while len(log) > logLength:
+            old: int = log.pop()
+            data[log.pop()] = old
+        del marks[3 * mark + 3:]
+        self._size = size
+        self._protected = marks[3 * mark + 2]
+
+    def release(self, mark: int) -> None:
+        """
+        Discard mark and the later marks, keeping the current contents
+        """
+        del self._marks[3 * mark:]
+        if len(self._marks) == 0:
+            del self._log[:]
+            self._protected = 0
+        else:
+            self._protected = self._marks[-1]
+
+    def top(self, k: int) -> memoryview:
+        """
+        The top k elements without copying, the bottom first
+
+        The view must be released before the stack grows beyond its capacity.
+        """
+        k = min(k, self._size)
+        return memoryview(self._data)[self._size - k:self._size]
+
+    def __iter__(self) -> Iterator[int]:  # Iterate from the top
+        for i in range(self._size - 1, -1, -1):
+            yield self._data[i]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __str__(self) -> str:  # Return the string representation of the stack, the bottom first
+        return f'[{",".join(map(str, self._data[:self._size]))}]'
+
+
 def palindrome(inputStr: str) -> bool:
     """
     return true if inputStr is palindrome
@@ -0,0 +1,216 @@
+"""
+DPDA simulated over many inputs at once with NumPy
+
+The inputs of a batch advance in lockstep: at every step each running input takes one transition,
+computed for all the inputs by array operations on the tables of CompiledPDA.
+"""
+from typing import Sequence
+import numpy as np
+from compiled import CompiledPDA
+
+# Status of an input
+RUNNING: int = 0
+ACCEPTED: int = 1
+STOPPED: int = 2# stop at a state not in F
+VACANT: int = 3# vacant stack
+UNDEFINED: int = 4# delta is not defined
+FOLDFAILED: int = 5# transitions without input stop or loop forever at the end of the input
+
+
+class VectorizedDPDA:
+    """
+    Dense transition tables of DPDA as arrays
+
+    The key (q,a,g) is k = (q*nA+a)*nG+g as in CompiledPDA; defined[k] tells if delta is defined,
+    target[k] is the next state, pushLen[k] is the number of pushed symbols and
+    push[k,:pushLen[k]] are the pushed symbols in the order they are pushed, the bottom first.
+    folded[q*nG+g] is the state at which g is popped by the transitions without input from q,
+    see CompiledPDA._epsilonFold(), or -1 if they stop or loop forever.
+    """
+
+    def __init__(self, compiled:CompiledPDA) -> None:
+        if not compiled.deterministic:
+            raise ValueError('only DPDA is vectorized')
+        self._compiled: CompiledPDA = compiled
+        (q_0,Z_0,F,start,target,pushStart,pushLen,pool) = compiled.tables()
+        self._q_0: int = q_0
+        self._Z_0: int = Z_0
+        self._F: np.ndarray = np.asarray(F,dtype=np.bool_)
+        self._nA: int = len(compiled.alphabet)
+        self._nG: int = len(compiled.stackAlphabet)
+        start_ = np.asarray(start,dtype=np.int64)
+        self._defined: np.ndarray = start_[1:] > start_[:-1]
+        # A DPDA has at most one alternative, which is the entry start[k]
+        first: np.ndarray = np.minimum(start_[:-1],max(len(target)-1,0))
+        targets = np.asarray(target,dtype=np.int32)
+        lengths = np.asarray(pushLen,dtype=np.int32)
+        starts = np.asarray(pushStart,dtype=np.int64)
+        self._target: np.ndarray = np.where(self._defined,targets[first],0) if len(target) > 0 else np.zeros(len(first),dtype=np.int32)
+        self._pushLen: np.ndarray = np.where(self._defined,lengths[first],0) if len(target) > 0 else np.zeros(len(first),dtype=np.int32)
+        self._maxPush: int = int(self._pushLen.max()) if len(self._pushLen) > 0 else 0
+        self._push: np.ndarray = np.zeros((len(first),max(self._maxPush,1)),dtype=np.int32)
+        poolArray = np.asarray(pool,dtype=np.int32)
+        for j in range(self._maxPush):
+            has: np.ndarray = self._pushLen > j
+            self._push[has,j] = poolArray[starts[first[has]]+j]
+        self._folded: np.ndarray = np.array([compiled._epsilonFold(q,g)[0] for q in range(len(compiled.states)) for g in range(self._nG)],
+                                            dtype=np.int64)
+        # Input symbols of one character by their code points, the other symbols never match a character
+        single: list[tuple[int,int]] = sorted((ord(s),i) for i,s in enumerate(compiled.alphabet) if len(s) == 1)
+        self._codes: np.ndarray = np.array([c for c,_ in single],dtype=np.uint32)
+        self._symbols: np.ndarray = np.array([i for _,i in single],dtype=np.int32)
+
+    @staticmethod
+    def fromPda(dpda) -> 'VectorizedDPDA':
+        return VectorizedDPDA(dpda.compile())
+
+    def accepts(self, inputs:Sequence[str], batchSize:int = 8192) -> list[tuple[bool, str]]:
+        """
+        (result,message) of each input, the same as DPDA.accepts()
+
+        The inputs are processed batchSize at a time. At the end of an input the symbols of the stack
+        are popped one at a time by the folded transitions without input, so that an input ends
+        with 'epsilon cycle at ...' if they loop forever.
+        """
+        results: list[tuple[bool, str]] = list()
+        for b in range(0,len(inputs),batchSize):
+            results.extend(self._acceptsBatch(inputs[b:b+batchSize]))
+        return results
+
+    def _encode(self, inputs:Sequence[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Input symbols as a 2-D array, the lengths, the code points of all the inputs and the offsets of the inputs in them
+
+        A symbol not in the alphabet is -1 and every row is padded with at least one 0,
+        the index of the empty string, so that the end of an input reads the transitions without input.
+        """
+        lengths: np.ndarray = np.array(list(map(len,inputs)),dtype=np.int64)
+        width: int = int(lengths.max())+1
+        encoded: np.ndarray = np.zeros((len(inputs),width),dtype=np.int32)
+        codes: np.ndarray = np.frombuffer(''.join(inputs).encode('utf-32-le'),dtype=np.uint32)
+        offsets: np.ndarray = np.cumsum(lengths)-lengths
+        if width == 1:
+            return encoded,lengths,codes,offsets
+        symbols: np.ndarray = np.full(len(codes),-1,dtype=np.int32)
+        if len(self._codes) > 0:
+            found: np.ndarray = np.minimum(np.searchsorted(self._codes,codes),len(self._codes)-1)
+            match: np.ndarray = self._codes[found] == codes
+            symbols[match] = self._symbols[found[match]]
+        # Position of each symbol in the flattened array
+        encoded.reshape(-1)[np.arange(len(codes))+np.repeat(np.arange(len(inputs))*width-offsets,lengths)] = symbols
+        return encoded,lengths,codes,offsets
+
+    def _acceptsBatch(self, inputs:Sequence[str]) -> list[tuple[bool, str]]:
+        n: int = len(inputs)
+        if n == 0:
+            return []
+        (encoded,lengths,codes,offsets) = self._encode(inputs)
+        symbols: np.ndarray = encoded.reshape(-1)
+        width: int = encoded.shape[1]
+        nA, nG = self._nA, self._nG
+        q: np.ndarray = np.full(n,self._q_0,dtype=np.int64)
+        pos: np.ndarray = np.zeros(n,dtype=np.int64)
+        height: np.ndarray = np.ones(n,dtype=np.int64)
+        capacity: int = max(8,2*self._maxPush)
+        stack: np.ndarray = np.zeros((n,capacity),dtype=np.int32)
+        stack[:,0] = self._Z_0
+        cells: np.ndarray = stack.reshape(-1)
+        status: np.ndarray = np.full(n,RUNNING,dtype=np.int8)
+        failTop: np.ndarray = np.zeros(n,dtype=np.int64)# stack top when delta is not defined
+        active: np.ndarray = np.arange(n)
+        while len(active) > 0:
+            h: np.ndarray = height[active]
+            a: np.ndarray = symbols[active*width+pos[active]]
+            reading: np.ndarray = a != 0
+            # Stack is empty
+            empty: np.ndarray = h == 0
+            if empty.any():
+                stopped = active[empty]
+                over: np.ndarray = reading[empty]
+                status[stopped[over]] = VACANT
+                ended = stopped[~over]
+                status[ended] = np.where(self._F[q[ended]],ACCEPTED,STOPPED)
+                keep: np.ndarray = ~empty
+                active, a, reading, h = active[keep], a[keep], reading[keep], h[keep]
+                if len(active) == 0:
+                    break
+            h = h-1
+            top: np.ndarray = active*capacity+h
+            g: np.ndarray = cells[top]
+            # The end of the input, the top is popped at once by the folded transitions without input
+            popped: np.ndarray = active[:0]
+            if not reading.all():
+                ending: np.ndarray = ~reading
+                ended = active[ending]
+                endTop: np.ndarray = g[ending]
+                p: np.ndarray = self._folded[q[ended]*nG+endTop]
+                failed: np.ndarray = p < 0
+                status[ended[failed]] = FOLDFAILED
+                failTop[ended[failed]] = endTop[failed]
+                popped = ended[~failed]
+                q[popped] = p[~failed]
+                height[popped] = h[ending][~failed]
+                active, a, h, top, g = active[reading], a[reading], h[reading], top[reading], g[reading]
+            k: np.ndarray = (q[active]*nA+a)*nG+g
+            defined: np.ndarray = self._defined[k] & (a >= 0)
+            if not defined.all():
+                undefined = active[~defined]
+                status[undefined] = UNDEFINED
+                failTop[undefined] = g[~defined]
+                active, h, top, k = active[defined], h[defined], top[defined], k[defined]
+            if len(active) > 0:
+                # Take the transition
+                pushed: np.ndarray = self._pushLen[k]
+                need: int = int((h+pushed).max())
+                if need > capacity:
+                    grownCapacity: int = capacity
+                    while grownCapacity < need:
+                        grownCapacity *= 2
+                    grown = np.zeros((n,grownCapacity),dtype=np.int32)
+                    grown[:,:capacity] = stack
+                    (stack,capacity) = (grown,grownCapacity)
+                    cells = stack.reshape(-1)
+                    top = active*capacity+h
+                for j in range(self._maxPush):
+                    has: np.ndarray = pushed > j
+                    cells[top[has]+j] = self._push[k[has],j]
+                height[active] = h+pushed
+                q[active] = self._target[k]
+                pos[active] += 1
+            active = np.concatenate((active,popped))
+        accepted: tuple[bool, str] = (True,'accepted')
+        results: list[tuple[bool, str]] = [accepted]*n
+        rejected: np.ndarray = np.nonzero(status != ACCEPTED)[0]
+        if len(rejected) == 0:
+            return results
+        # The message is made once for each combination of the values it depends on
+        s: np.ndarray = status[rejected].astype(np.int64)
+        undefined: np.ndarray = s == UNDEFINED
+        p: np.ndarray = pos[rejected]
+        inside: np.ndarray = undefined & (p < lengths[rejected])
+        char: np.ndarray = np.full(len(rejected),-1,dtype=np.int64)# -1 for the end of the input
+        char[inside] = codes[offsets[rejected[inside]]+p[inside]]
+        # (status,q,char+1,top) as one integer
+        nQ, nC = len(self._compiled.states), 0x110001
+        keys: np.ndarray = ((s*nQ+np.where(s == VACANT,0,q[rejected]))*nC+char+1)*nG+np.where(undefined|(s == FOLDFAILED),failTop[rejected],0)
+        (unique,inverse) = np.unique(keys,return_inverse=True)
+        messages: list[tuple[bool, str]] = list()
+        for key in unique.tolist():
+            (key,top) = divmod(key,nG)
+            (key,char1) = divmod(key,nC)
+            (st,qq) = divmod(key,nQ)
+            messages.append(self._result(st,qq,char1-1,top))
+        for (i,j) in zip(rejected.tolist(),inverse.reshape(-1).tolist()):
+            results[i] = messages[j]
+        return results
+
+    def _result(self, status:int, q:int, char:int, top:int) -> tuple[bool, str]:
+        compiled = self._compiled
+        if status == STOPPED:
+            return False,f'stop at {compiled.states[q]}'
+        if status == VACANT:
+            return False,'vacant stack'
+        if status == FOLDFAILED:
+            return False,compiled._epsilonFold(q,top)[1]# type: ignore[return-value]
+        f: tuple[str,str,str] = (compiled.states[q],'' if char < 0 else chr(char),compiled.stackAlphabet[top])
+        return False,f'delta({f}) is not defined'